@@ -5,14 +5,33 @@ for Standard Management Company.
 """
 import os
 import sys
+import hashlib
+import importlib.util
 import logging
 import secrets
-from datetime import datetime, timedelta
+import tempfile
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+from functools import lru_cache
+from itertools import groupby
+from operator import attrgetter, itemgetter
 from pathlib import Path
+from urllib.parse import unquote
 from decimal import Decimal
 
-from flask import Flask, render_template, request, redirect, url_for, flash, session, make_response, send_file, jsonify
-from msal import ConfidentialClientApplication
+import orjson
+import pandas as pd
+import redis
+from flask import Flask, Response, render_template, request, redirect, url_for, flash, session, make_response, send_file, jsonify
+from flask.json.provider import DefaultJSONProvider
+from flask_caching import Cache
+from flask_compress import Compress
+from flask_session import Session
+from jinja2 import FileSystemBytecodeCache
+from msal import ConfidentialClientApplication, SerializableTokenCache
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 
@@ -25,14 +44,73 @@ from foundation.auth import login_required
 # Import database queries
 from database import queries
 from models import Entity, Building, BudgetItem, Document
-from utils.azure_storage import azure_storage
+from utils.azure_storage import azure_storage, CountingStream
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider backed by orjson for faster jsonify/response encoding"""
+    option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC
+
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string"""
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        """Deserialize JSON from a str or bytes"""
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """Build a JSON response, passing orjson's bytes straight through"""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=self.default, option=self.option),
+            mimetype=self.mimetype
+        )
+
 
 # Initialize Flask app
 app = Flask(__name__)
-app.config['SECRET_KEY'] = os.getenv('FLASK_SECRET_KEY', secrets.token_hex(32))
+app.json = OrjsonProvider(app)
+# Every worker must sign sessions with the same key, so a missing key is fatal
+# rather than silently replaced by a per-process random one
+SECRET_KEY = os.getenv('FLASK_SECRET_KEY')
+if not SECRET_KEY:
+    raise RuntimeError('FLASK_SECRET_KEY must be set')
+app.config['SECRET_KEY'] = SECRET_KEY
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=7)
 app.config['UPLOAD_FOLDER'] = os.getenv('UPLOAD_FOLDER', './uploads')
 app.config['MAX_CONTENT_LENGTH'] = int(os.getenv('MAX_CONTENT_LENGTH', 16777216))  # 16MB
+# Let the front-end server (nginx/Apache) send local files via X-Sendfile
+app.config['USE_X_SENDFILE'] = os.getenv('USE_X_SENDFILE', 'false').lower() == 'true'
+
+# Compress HTML/JSON responses (Brotli preferred, gzip fallback)
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 512
+Compress(app)
+
+# Cache compiled templates on disk so new workers skip Jinja's parse/compile step
+JINJA_CACHE_DIR = os.getenv('JINJA_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'jinja_cache'))
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+app.jinja_env.bytecode_cache = FileSystemBytecodeCache(JINJA_CACHE_DIR)
+
+# Query cache: Redis when REDIS_URL is configured, otherwise disabled. A
+# per-process cache would let other workers serve stale rows after a write,
+# since invalidation only reaches the worker that made it
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    app.config['CACHE_TYPE'] = 'RedisCache'
+    app.config['CACHE_REDIS_URL'] = REDIS_URL
+else:
+    app.config['CACHE_TYPE'] = 'NullCache'
+app.config['CACHE_DEFAULT_TIMEOUT'] = int(os.getenv('CACHE_DEFAULT_TIMEOUT', 60))
+cache = Cache(app)
+
+# Server-side sessions in Redis (cookie holds only the session ID); without
+# REDIS_URL Flask's default signed-cookie sessions are used
+if REDIS_URL:
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = redis.Redis.from_url(REDIS_URL)
+    Session(app)
 
 # Ensure upload folder exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
@@ -45,19 +123,247 @@ REDIRECT_URI = os.getenv('REDIRECT_URI', 'http://localhost:5000/auth/callback')
 AUTHORITY = f"https://login.microsoftonline.com/{MS_TENANT_ID}"
 
 # Configure logging
+# LOG_LEVEL=WARNING in production skips INFO record creation on hot paths
 logging.basicConfig(
-    level=logging.INFO,
+    level=os.getenv('LOG_LEVEL', 'INFO').upper(),
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+# Autoescaping every rendered value is much slower without MarkupSafe's C extension
+if importlib.util.find_spec('markupsafe._speedups') is None:
+    logger.warning("MarkupSafe C speedups are not available; template escaping will be slow")
+
 # Allowed file extensions
-ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx', 'xls', 'xlsx', 'txt', 'png', 'jpg', 'jpeg'}
+ALLOWED_EXTENSIONS = frozenset({'pdf', 'doc', 'docx', 'xls', 'xlsx', 'txt', 'png', 'jpg', 'jpeg'})
+
+# Editable building form fields: the columns queries.update_building accepts
+BUILDING_FORM_FIELDS = frozenset(queries.BUILDING_COLUMNS)
+
+# Entity document categories
+ENTITY_DOCUMENT_CATEGORIES = ('Operating Agreement', 'EIN Form (SS-4)', 'Other')
 
 
 def allowed_file(filename):
     """Check if file extension is allowed"""
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    _, dot, ext = filename.rpartition('.')
+    return bool(dot) and ext.lower() in ALLOWED_EXTENSIONS
+
+
+@lru_cache(maxsize=32)
+def _months_from(year, month, count):
+    """First day of each month for `count` months from (year, month), memoized per anchor month"""
+    base = year * 12 + month - 1
+    return tuple(datetime(m // 12, m % 12 + 1, 1) for m in range(base, base + count))
+
+
+def generate_months(count, start=None):
+    """First day of each month for `count` months starting at `start` (default: now)"""
+    start = start or datetime.now()
+    return _months_from(start.year, start.month, count)
+
+
+def pivot_entity_budget(df):
+    """Pivot the entity budget frame (one row per building/month/category) for the budget grids.
+
+    Amount conversion and the category/month totals are done column-wise with
+    pandas; MONTH_YEAR arrives already normalized by the query layer. Returns
+    three dicts: category -> month -> total, category -> 'YYYY-MM-DD' ->
+    building_id -> amount, and building_id -> building name.
+    """
+    if df.empty:
+        return {}, {}, {}
+
+    df['AMOUNT'] = pd.to_numeric(df['AMOUNT'], errors='coerce')
+
+    invalid = df['MONTH_YEAR'].isna() | df['AMOUNT'].isna()
+    if invalid.any():
+        logger.error(f"Skipping {int(invalid.sum())} budget rows with invalid month or amount")
+        df = df[~invalid]
+
+    budget_by_category = {}
+    totals = df.groupby(['CATEGORY', 'MONTH_YEAR'], sort=False)['AMOUNT'].sum()
+    for (category, month), total in zip(totals.index, totals.tolist()):
+        budget_by_category.setdefault(category, {})[month.to_pydatetime()] = total
+
+    # Flat (category, month) keys keep the per-row work to one lookup; nest per group afterwards
+    by_category_month = defaultdict(dict)
+    months = df['MONTH_YEAR'].dt.to_pydatetime()
+    for key, building_id, amount in zip(zip(df['CATEGORY'], months), df['BUILDING_ID'], df['AMOUNT'].tolist()):
+        by_category_month[key][building_id] = amount
+
+    # Drill-down months are keyed as 'YYYY-MM-DD' strings so the dict is JSON-ready as built
+    budget_by_category_building = {}
+    for (category, month), amounts in by_category_month.items():
+        budget_by_category_building.setdefault(category, {})[month.strftime('%Y-%m-%d')] = amounts
+
+    buildings_dict = dict(zip(df['BUILDING_ID'], df['BUILDING_NAME']))
+
+    return budget_by_category, budget_by_category_building, buildings_dict
+
+
+def pivot_building_budget(rows):
+    """Pivot a building's budget rows into category -> month -> amount, column-wise with pandas"""
+    df = pd.DataFrame(rows, columns=['CATEGORY', 'MONTH_YEAR', 'AMOUNT'])
+    df['MONTH_YEAR'] = pd.to_datetime(df['MONTH_YEAR'], errors='coerce')
+    df['AMOUNT'] = pd.to_numeric(df['AMOUNT'], errors='coerce')
+
+    invalid = df['MONTH_YEAR'].isna() | df['AMOUNT'].isna()
+    if invalid.any():
+        logger.error(f"Skipping {int(invalid.sum())} budget rows with invalid month or amount")
+        df = df[~invalid]
+
+    return {
+        category: dict(zip(group['MONTH_YEAR'].dt.to_pydatetime(), group['AMOUNT'].tolist()))
+        for category, group in df.groupby('CATEGORY', sort=False)
+    }
+
+
+def pivot_shared_budget(rows):
+    """Pivot entity budget totals (month, category, total) into the shared-view grid.
+
+    Returns month -> category -> amount and the sorted month/category axes,
+    plus every cell, row total and column total already formatted as
+    currency so the template only prints strings.
+    """
+    df = pd.DataFrame(rows, columns=['MONTH_YEAR', 'CATEGORY', 'TOTAL_AMOUNT'])
+    if df.empty:
+        return {'budget_by_month': {}, 'months': [], 'categories': [],
+                'rows': [], 'month_totals': [], 'grand_total': '$0.00'}
+
+    df['TOTAL_AMOUNT'] = pd.to_numeric(df['TOTAL_AMOUNT'], errors='coerce').fillna(0)
+    grid = df.pivot_table(index='MONTH_YEAR', columns='CATEGORY', values='TOTAL_AMOUNT',
+                          aggfunc='sum', fill_value=0)
+
+    months = list(grid.index.to_pydatetime())
+    categories = grid.columns.tolist()
+    budget_by_month = {month: dict(zip(categories, amounts)) for month, amounts in zip(months, grid.to_numpy().tolist())}
+
+    money = '${:,.2f}'.format
+    rows = [
+        (category, [money(amount) for amount in grid[category].tolist()], money(total))
+        for category, total in zip(categories, grid.sum(axis=0).tolist())
+    ]
+
+    return {
+        'budget_by_month': budget_by_month,
+        'months': months,
+        'categories': categories,
+        'rows': rows,
+        'month_totals': [money(total) for total in grid.sum(axis=1).tolist()],
+        'grand_total': money(float(grid.to_numpy().sum())),
+    }
+
+
+# MSAL client, built once and shared across requests (construction performs
+# tenant metadata discovery over HTTPS)
+_msal_app = None
+_msal_app_lock = threading.Lock()
+
+
+def get_msal_app():
+    """Get the shared MSAL ConfidentialClientApplication"""
+    global _msal_app
+    if _msal_app is None:
+        with _msal_app_lock:
+            if _msal_app is None:
+                _msal_app = ConfidentialClientApplication(
+                    MS_CLIENT_ID,
+                    authority=AUTHORITY,
+                    client_credential=MS_CLIENT_SECRET,
+                    token_cache=SerializableTokenCache()
+                )
+    return _msal_app
+
+
+# ============================================================================
+# Cached Queries
+# ============================================================================
+
+get_all_entities_cached = cache.memoize()(queries.get_all_entities)
+get_entity_cached = cache.memoize(timeout=120)(queries.get_entity_by_id)
+get_buildings_cached = cache.memoize()(queries.get_buildings_by_entity)
+get_building_cached = cache.memoize(timeout=30)(queries.get_building_by_id)
+get_budget_items_cached = cache.memoize(timeout=30)(queries.get_budget_items)
+get_documents_cached = cache.memoize(timeout=30)(queries.get_documents_by_building)
+get_share_token_cached = cache.memoize()(queries.get_existing_share_token)
+get_entity_page_cached = cache.memoize()(queries.get_entity_page)
+
+
+def load_shared_view(entity_id):
+    """Buildings and the aggregated, pre-formatted budget grid (see pivot_shared_budget) for the public shared view"""
+    # Buildings and the aggregate budget are independent; fetch them concurrently
+    payload_future = query_executor.submit(lambda: pivot_shared_budget(queries.get_entity_budget(entity_id)))
+    buildings = queries.get_buildings_by_entity(entity_id)
+    return buildings, payload_future.result()
+
+
+@cache.memoize(timeout=30)
+def get_shared_view_cached(entity_id, version):
+    """Cached load_shared_view keyed on the entity's data version, so the body always matches the ETag built from it"""
+    return load_shared_view(entity_id)
+
+
+def invalidate_entity_cache(entity_id=None):
+    """Drop cached entity reads after a write"""
+    cache.delete_memoized(get_all_entities_cached)
+    if entity_id:
+        cache.delete_memoized(get_entity_cached, entity_id)
+        cache.delete_memoized(get_share_token_cached, entity_id)
+        invalidate_buildings_cache(entity_id)
+
+
+def invalidate_buildings_cache(entity_id):
+    """Drop cached building lists (and the entity page embedding them) after a building write"""
+    cache.delete_memoized(get_buildings_cached, entity_id)
+    cache.delete_memoized(get_entity_page_cached, entity_id)
+
+
+def invalidate_building_cache(building_id):
+    """Drop a cached building row (and its budget and documents) after it is updated or deleted"""
+    cache.delete_memoized(get_building_cached, building_id)
+    cache.delete_memoized(get_budget_items_cached, building_id)
+    invalidate_documents_cache(building_id)
+
+
+def invalidate_budget_cache(building_id):
+    """Drop a building's cached budget items after a budget write
+
+    The shared view needs no invalidation: its cache is keyed on the entity's data version.
+    """
+    cache.delete_memoized(get_budget_items_cached, building_id)
+
+
+def invalidate_documents_cache(building_id):
+    """Drop a building's cached document list after a document write"""
+    cache.delete_memoized(get_documents_cached, building_id)
+
+
+# ============================================================================
+# Concurrent Reads
+# ============================================================================
+
+# Independent page queries are dispatched here so their round trips overlap;
+# the Snowflake driver releases the GIL while waiting on the network
+query_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='query')
+
+
+# ============================================================================
+# Background Writes
+# ============================================================================
+
+background_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='background-write')
+
+
+def _report_file_delete_failure(file_path):
+    """Done-callback for a background stored-file delete that logs when the file was left behind"""
+    def report(future):
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Background delete of stored file {file_path} failed: {error}")
+        elif not future.result():
+            logger.error(f"Background delete of stored file {file_path} did not succeed; file may be orphaned")
+    return report
 
 
 # ============================================================================
@@ -71,11 +377,7 @@ def login():
     session['state'] = state
     session.permanent = True
 
-    msal_app = ConfidentialClientApplication(
-        MS_CLIENT_ID,
-        authority=AUTHORITY,
-        client_credential=MS_CLIENT_SECRET
-    )
+    msal_app = get_msal_app()
 
     auth_url = msal_app.get_authorization_request_url(
         scopes=['User.Read'],
@@ -119,11 +421,7 @@ def auth_callback():
         return redirect(url_for('login'))
 
     try:
-        msal_app = ConfidentialClientApplication(
-            MS_CLIENT_ID,
-            authority=AUTHORITY,
-            client_credential=MS_CLIENT_SECRET
-        )
+        msal_app = get_msal_app()
 
         result = msal_app.acquire_token_by_authorization_code(
             code,
@@ -139,7 +437,7 @@ def auth_callback():
                 'authenticated': True
             }
 
-            logger.info(f"User authenticated: {session['user']['email']}")
+            logger.info("User authenticated: %s", session['user']['email'])
             flash('Successfully logged in', 'success')
             return redirect(url_for('home'))
         else:
@@ -160,7 +458,7 @@ def logout():
     """Log out user"""
     user_email = session.get('user', {}).get('email', 'Unknown')
     session.clear()
-    logger.info(f"User logged out: {user_email}")
+    logger.info("User logged out: %s", user_email)
     flash('Successfully logged out', 'success')
     return redirect(url_for('login'))
 
@@ -175,14 +473,11 @@ def logout():
 def home():
     """Landing page / list all entities"""
     try:
-        entities_data = queries.get_all_entities()
-        entities = [Entity.from_dict(e) for e in entities_data]
+        entities_data = get_all_entities_cached()
+        entities = Entity.from_records(entities_data)
 
-        # Get financial metrics for each entity
-        entity_metrics = {}
-        for entity in entities:
-            metrics = queries.get_entity_financial_metrics(entity.entity_id)
-            entity_metrics[entity.entity_id] = metrics
+        # Get financial metrics for all entities in one batch
+        entity_metrics = queries.get_financial_metrics_for_entities([entity.entity_id for entity in entities])
 
         return render_template('entity/list.html', entities=entities, entity_metrics=entity_metrics)
     except Exception as e:
@@ -213,7 +508,8 @@ def create_entity():
 
         try:
             entity_id = queries.create_entity(name, description, ein, accounting_method)
-            logger.info(f"Entity created: {name} (ID: {entity_id})")
+            invalidate_entity_cache()
+            logger.info("Entity created: %s (ID: %s)", name, entity_id)
 
             # Check if this is an AJAX request
             if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
@@ -250,137 +546,72 @@ def create_entity():
 def view_entity(entity_id):
     """View entity with buildings list"""
     try:
-        entity_data = queries.get_entity_by_id(entity_id)
-        if not entity_data:
+        # Entity, buildings and share token in a single round trip
+        page_data = get_entity_page_cached(entity_id)
+        if not page_data:
             flash('Entity not found', 'error')
             return redirect(url_for('home'))
 
-        entity = Entity.from_dict(entity_data)
-        buildings_data = queries.get_buildings_by_entity(entity_id)
-        buildings = [Building.from_dict(b) for b in buildings_data]
-
-        # Get financial metrics for each building
-        building_metrics = {}
-        building_debt = {}
-        for building in buildings:
-            metrics = queries.get_building_financial_metrics(building.building_id)
-            building_metrics[building.building_id] = metrics
-
-            # Get current debt position
-            debt_info = queries.get_building_current_debt(building.building_id)
-            building_debt[building.building_id] = debt_info
-
-        # Get share token if exists
-        share_token = queries.get_existing_share_token(entity_id)
-
-        # Get entity documents
-        entity_documents = queries.get_entity_documents(entity_id)
-
-        # Get consolidated budget data with building breakdown
-        budget_data_with_buildings = queries.get_entity_budget_with_buildings(entity_id)
-
-        # Generate 12 months starting from current month
-        today = datetime.now()
-        months = []
-        for i in range(12):
-            month_offset = today.month + i - 1
-            year_offset = month_offset // 12
-            month = (month_offset % 12) + 1
-            year = today.year + year_offset
-            month_date = datetime(year, month, 1, 0, 0, 0, 0)
-            months.append(month_date)
-
-        # Organize data: category -> month -> total (and also by building for drill-down)
-        budget_by_category = {}  # category -> month -> total_amount
-        budget_by_category_building = {}  # category -> month -> building_id -> amount
-        buildings_dict = {}  # building_id -> building_name
-
-        for item in budget_data_with_buildings:
-            try:
-                building_id = item['BUILDING_ID']
-                building_name = item['BUILDING_NAME']
-                category = item['CATEGORY']
-                month_year = item['MONTH_YEAR']
-                amount = float(item['AMOUNT'])
-
-                # Convert month_year to datetime
-                if isinstance(month_year, str):
-                    try:
-                        month_year = datetime.strptime(month_year, '%Y-%m-%d')
-                    except ValueError:
-                        month_year = datetime.fromisoformat(month_year)
-                elif isinstance(month_year, datetime):
-                    month_year = month_year.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                elif hasattr(month_year, 'year') and hasattr(month_year, 'month'):
-                    month_year = datetime(month_year.year, month_year.month, 1, 0, 0, 0, 0)
-
-                # Track buildings
-                if building_id not in buildings_dict:
-                    buildings_dict[building_id] = building_name
-
-                # Aggregate totals by category and month
-                if category not in budget_by_category:
-                    budget_by_category[category] = {}
-                if month_year not in budget_by_category[category]:
-                    budget_by_category[category][month_year] = 0
-                budget_by_category[category][month_year] += amount
-
-                # Store building-level detail for drill-down
-                if category not in budget_by_category_building:
-                    budget_by_category_building[category] = {}
-                if month_year not in budget_by_category_building[category]:
-                    budget_by_category_building[category][month_year] = {}
-                budget_by_category_building[category][month_year][building_id] = amount
-
-            except Exception as item_error:
-                logger.error(f"Error processing budget item: {item}, error: {item_error}")
-                continue
-
-        categories = BudgetItem.CATEGORIES
-        operating_expense_categories = BudgetItem.OPERATING_EXPENSE_CATEGORIES
-        debt_service_categories = BudgetItem.DEBT_SERVICE_CATEGORIES
-
-        # Convert datetime keys to strings for JSON serialization
-        budget_by_category_building_json = {}
-        for category, months_data in budget_by_category_building.items():
-            budget_by_category_building_json[category] = {}
-            for month, buildings_data in months_data.items():
-                month_str = month.strftime('%Y-%m-%d') if isinstance(month, datetime) else str(month)
-                budget_by_category_building_json[category][month_str] = buildings_data
-
-        return render_template('entity/view.html',
-                             entity=entity,
-                             buildings=buildings,
-                             building_metrics=building_metrics,
-                             building_debt=building_debt,
-                             share_token=share_token,
-                             entity_documents=entity_documents,
-                             budget_by_category=budget_by_category,
-                             budget_by_category_building=budget_by_category_building,
-                             budget_by_category_building_json=budget_by_category_building_json,
-                             buildings_dict=buildings_dict,
-                             months=months,
-                             categories=categories,
-                             operating_expense_categories=operating_expense_categories,
-                             debt_service_categories=debt_service_categories)
+        return _render_entity_view(page_data['entity'], page_data['share_token'], page_data['buildings'])
     except Exception as e:
         logger.error(f"Failed to load entity: {e}", exc_info=True)
         flash('Failed to load entity', 'error')
         return redirect(url_for('home'))
 
 
+def _render_entity_view(entity_data, share_token, buildings_data):
+    """Render the entity page from an already-loaded entity record, share token and buildings"""
+    entity = Entity.from_dict(entity_data)
+    entity_id = entity.entity_id
+    buildings = Building.from_records(buildings_data)
+
+    # Building metrics, debt, entity documents and the consolidated budget are
+    # independent of each other, so fetch them concurrently
+    building_ids = [building.building_id for building in buildings]
+    metrics_future = query_executor.submit(queries.get_building_financial_metrics_bulk, building_ids)
+    debt_future = query_executor.submit(queries.get_building_current_debt_bulk, building_ids)
+    documents_future = query_executor.submit(queries.get_entity_documents, entity_id)
+    budget_future = query_executor.submit(queries.get_entity_budget_frame, entity_id)
+
+    building_metrics = metrics_future.result()
+    building_debt = debt_future.result()
+    entity_documents = documents_future.result()
+    budget_frame = budget_future.result()
+
+    # Generate 12 months starting from current month
+    months = generate_months(12)
+
+    # Organize data: category -> month -> total (and also by building for drill-down)
+    budget_by_category, budget_by_category_building, buildings_dict = pivot_entity_budget(budget_frame)
+
+    categories = BudgetItem.CATEGORIES
+    operating_expense_categories = BudgetItem.OPERATING_EXPENSE_CATEGORIES
+    debt_service_categories = BudgetItem.DEBT_SERVICE_CATEGORIES
+
+    return render_template('entity/view.html',
+                         entity=entity,
+                         buildings=buildings,
+                         building_metrics=building_metrics,
+                         building_debt=building_debt,
+                         share_token=share_token,
+                         entity_documents=entity_documents,
+                         budget_by_category=budget_by_category,
+                         budget_by_category_building=budget_by_category_building,
+                         budget_by_category_building_json=budget_by_category_building,
+                         buildings_dict=buildings_dict,
+                         months=months,
+                         categories=categories,
+                         operating_expense_categories=operating_expense_categories,
+                         debt_service_categories=debt_service_categories)
+
+
 @app.route('/entities/<entity_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_entity(entity_id):
     """Edit an existing entity"""
     try:
-        entity_data = queries.get_entity_by_id(entity_id)
-        if not entity_data:
-            flash('Entity not found', 'error')
-            return redirect(url_for('home'))
-
-        entity = Entity.from_dict(entity_data)
-
+        # A successful POST goes straight to the UPDATE (which reports a missing
+        # entity itself); the entity is only loaded to render the form
         if request.method == 'POST':
             name = request.form.get('name', '').strip()
             description = request.form.get('description', '').strip()
@@ -389,15 +620,20 @@ def edit_entity(entity_id):
 
             if not name:
                 flash('Entity name is required', 'error')
-                return render_template('entity/edit.html', entity=entity)
-
-            if queries.update_entity(entity_id, name, description, ein, accounting_method):
-                logger.info(f"Entity updated: {entity_id}")
+            elif queries.update_entity(entity_id, name, description, ein, accounting_method):
+                invalidate_entity_cache(entity_id)
+                logger.info("Entity updated: %s", entity_id)
                 flash(f'Successfully updated entity: {name}', 'success')
                 return redirect(url_for('view_entity', entity_id=entity_id))
             else:
                 flash('Failed to update entity', 'error')
 
+        entity_data = get_entity_cached(entity_id)
+        if not entity_data:
+            flash('Entity not found', 'error')
+            return redirect(url_for('home'))
+
+        entity = Entity.from_dict(entity_data)
         return render_template('entity/edit.html', entity=entity)
     except Exception as e:
         logger.error(f"Failed to edit entity: {e}", exc_info=True)
@@ -410,15 +646,22 @@ def edit_entity(entity_id):
 def delete_entity(entity_id):
     """Delete an entity"""
     try:
-        entity_data = queries.get_entity_by_id(entity_id)
+        entity_data = get_entity_cached(entity_id)
         if not entity_data:
             flash('Entity not found', 'error')
             return redirect(url_for('home'))
 
         entity_name = entity_data.get('NAME', 'Unknown')
 
+        # Collect the stored files before their document rows go away
+        file_paths = queries.get_unshared_entity_document_files(entity_id)
+
         if queries.delete_entity(entity_id):
-            logger.info(f"Entity deleted: {entity_id}")
+            invalidate_entity_cache(entity_id)
+            for file_path in file_paths:
+                future = background_executor.submit(azure_storage.delete_building_document, file_path)
+                future.add_done_callback(_report_file_delete_failure(file_path))
+            logger.info("Entity deleted: %s", entity_id)
             flash(f'Successfully deleted entity: {entity_name}', 'success')
         else:
             flash('Failed to delete entity', 'error')
@@ -435,24 +678,21 @@ def delete_entity(entity_id):
 def generate_share_link(entity_id):
     """Generate shareable link for entity"""
     try:
-        entity_data = queries.get_entity_by_id(entity_id)
+        entity_data = get_entity_cached(entity_id)
         if not entity_data:
             flash('Entity not found', 'error')
             return redirect(url_for('home'))
 
-        # Check if token already exists
-        existing_token = queries.get_existing_share_token(entity_id)
-
-        if existing_token:
-            token = existing_token
-            logger.info(f"Using existing share token for entity {entity_id}")
+        token = get_share_token_cached(entity_id)
+        if token:
+            logger.info("Using existing share token for entity %s", entity_id)
         else:
             token = queries.create_share_token(entity_id)
-            logger.info(f"Created new share token for entity {entity_id}")
-
-        share_url = url_for('shared_view', token=token, _external=True)
+            invalidate_entity_cache(entity_id)
         flash('Shareable link generated', 'success')
 
+        # Post/Redirect/Get so refreshing or bookmarking the entity page does
+        # not re-run this; the entity page read is cached, so the redirect is cheap
         return redirect(url_for('view_entity', entity_id=entity_id))
     except Exception as e:
         logger.error(f"Failed to generate share link: {e}", exc_info=True)
@@ -465,7 +705,7 @@ def generate_share_link(entity_id):
 def entity_budget(entity_id):
     """View aggregate budget for all buildings in entity with drill-down"""
     try:
-        entity_data = queries.get_entity_by_id(entity_id)
+        entity_data = get_entity_cached(entity_id)
         if not entity_data:
             flash('Entity not found', 'error')
             return redirect(url_for('home'))
@@ -473,58 +713,13 @@ def entity_budget(entity_id):
         entity = Entity.from_dict(entity_data)
 
         # Get budget data with building breakdown
-        budget_data_with_buildings = queries.get_entity_budget_with_buildings(entity_id)
+        budget_frame = queries.get_entity_budget_frame(entity_id)
 
         # Generate 12 months starting from current month
-        today = datetime.now()
-        months = []
-        for i in range(12):
-            # Calculate year and month correctly
-            month_offset = today.month + i - 1
-            year_offset = month_offset // 12
-            month = (month_offset % 12) + 1
-            year = today.year + year_offset
-            month_date = datetime(year, month, 1, 0, 0, 0, 0)
-            months.append(month_date)
+        months = generate_months(12)
 
         # Organize data by category, then month, then building
-        budget_structure = {}
-        buildings_dict = {}
-
-        for item in budget_data_with_buildings:
-            try:
-                building_id = item['BUILDING_ID']
-                building_name = item['BUILDING_NAME']
-                category = item['CATEGORY']
-                month_year = item['MONTH_YEAR']
-                amount = float(item['AMOUNT'])
-
-                # Convert month_year to datetime
-                if isinstance(month_year, str):
-                    try:
-                        month_year = datetime.strptime(month_year, '%Y-%m-%d')
-                    except ValueError:
-                        month_year = datetime.fromisoformat(month_year)
-                elif isinstance(month_year, datetime):
-                    month_year = month_year.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                elif hasattr(month_year, 'year') and hasattr(month_year, 'month'):
-                    month_year = datetime(month_year.year, month_year.month, 1, 0, 0, 0, 0)
-
-                # Track buildings
-                if building_id not in buildings_dict:
-                    buildings_dict[building_id] = building_name
-
-                # Organize by category -> month -> building
-                if category not in budget_structure:
-                    budget_structure[category] = {}
-                if month_year not in budget_structure[category]:
-                    budget_structure[category][month_year] = {}
-
-                budget_structure[category][month_year][building_id] = amount
-
-            except Exception as item_error:
-                logger.error(f"Error processing budget item: {item}, error: {item_error}", exc_info=True)
-                continue
+        _, budget_structure, buildings_dict = pivot_entity_budget(budget_frame)
 
         categories = BudgetItem.CATEGORIES
         operating_expense_categories = BudgetItem.OPERATING_EXPENSE_CATEGORIES
@@ -553,7 +748,7 @@ def entity_budget(entity_id):
 def create_building(entity_id):
     """Create a new building for an entity"""
     try:
-        entity_data = queries.get_entity_by_id(entity_id)
+        entity_data = get_entity_cached(entity_id)
         if not entity_data:
             flash('Entity not found', 'error')
             return redirect(url_for('home'))
@@ -569,7 +764,8 @@ def create_building(entity_id):
                 return render_template('building/create.html', entity=entity)
 
             building_id = queries.create_building(entity_id, name, address)
-            logger.info(f"Building created: {name} (ID: {building_id})")
+            invalidate_buildings_cache(entity_id)
+            logger.info("Building created: %s (ID: %s)", name, building_id)
             flash(f'Successfully created building: {name}', 'success')
             return redirect(url_for('view_entity', entity_id=entity_id))
 
@@ -584,7 +780,8 @@ def create_building(entity_id):
 @login_required
 def view_building(building_id):
     """Redirect to building budget (primary view)"""
-    return redirect(url_for('view_budget', building_id=building_id))
+    # Permanent, so browsers cache it and skip this hop on later visits
+    return redirect(url_for('view_budget', building_id=building_id), code=301)
 
 
 @app.route('/buildings/<building_id>/edit', methods=['GET', 'POST'])
@@ -592,53 +789,29 @@ def view_building(building_id):
 def edit_building(building_id):
     """Edit an existing building"""
     try:
-        building_data = queries.get_building_by_id(building_id)
-        if not building_data:
+        # Building and its entity in one round trip
+        page_data = queries.get_building_with_entity(building_id)
+        if not page_data:
             flash('Building not found', 'error')
             return redirect(url_for('home'))
 
-        building = Building.from_dict(building_data)
-
-        # Get entity info
-        entity_data = queries.get_entity_by_id(building.entity_id)
-        entity = Entity.from_dict(entity_data) if entity_data else None
+        building = Building.from_dict(page_data['building'])
+        entity = Entity.from_dict(page_data['entity']) if page_data['entity'] else None
 
         if request.method == 'POST':
-            name = request.form.get('name', '').strip()
-            address = request.form.get('address', '').strip()
-
-            # Get debt information
-            purchase_price = request.form.get('purchase_price', '').strip() or None
-            original_loan_amount = request.form.get('original_loan_amount', '').strip() or None
-            loan_origination_date = request.form.get('loan_origination_date', '').strip() or None
-            loan_duration_years = request.form.get('loan_duration_years', '').strip() or None
-            interest_rate = request.form.get('interest_rate', '').strip() or None
-            additional_principal_paid = request.form.get('additional_principal_paid', '').strip() or None
-            loan_number = request.form.get('loan_number', '').strip() or None
-            lender = request.form.get('lender', '').strip() or None
-            loan_login_username = request.form.get('loan_login_username', '').strip() or None
-
-            # Get secondary loan information
-            secondary_loan_amount = request.form.get('secondary_loan_amount', '').strip() or None
-            secondary_loan_origination_date = request.form.get('secondary_loan_origination_date', '').strip() or None
-            secondary_loan_duration_years = request.form.get('secondary_loan_duration_years', '').strip() or None
-            secondary_interest_rate = request.form.get('secondary_interest_rate', '').strip() or None
-            secondary_additional_principal_paid = request.form.get('secondary_additional_principal_paid', '').strip() or None
-            secondary_loan_number = request.form.get('secondary_loan_number', '').strip() or None
-            secondary_lender = request.form.get('secondary_lender', '').strip() or None
-            secondary_loan_login_username = request.form.get('secondary_loan_login_username', '').strip() or None
+            # Building, debt and secondary loan fields in one pass over the form;
+            # blank values become None (NULL)
+            fields = {key: value.strip() or None for key, value in request.form.items() if key in BUILDING_FORM_FIELDS}
+            name = fields.get('name')
 
             if not name:
                 flash('Building name is required', 'error')
                 return render_template('building/edit.html', building=building, entity=entity)
 
-            if queries.update_building(building_id, name, address, purchase_price, original_loan_amount,
-                                      loan_origination_date, loan_duration_years, interest_rate, additional_principal_paid,
-                                      loan_number, lender, loan_login_username,
-                                      secondary_loan_amount, secondary_loan_origination_date, secondary_loan_duration_years,
-                                      secondary_interest_rate, secondary_additional_principal_paid,
-                                      secondary_loan_number, secondary_lender, secondary_loan_login_username):
-                logger.info(f"Building updated: {building_id}")
+            if queries.update_building(building_id, **fields):
+                invalidate_buildings_cache(building.entity_id)
+                invalidate_building_cache(building_id)
+                logger.info("Building updated: %s", building_id)
                 flash(f'Successfully updated building: {name}', 'success')
                 return redirect(url_for('view_building', building_id=building_id))
             else:
@@ -656,7 +829,7 @@ def edit_building(building_id):
 def delete_building(building_id):
     """Delete a building"""
     try:
-        building_data = queries.get_building_by_id(building_id)
+        building_data = get_building_cached(building_id)
         if not building_data:
             flash('Building not found', 'error')
             return redirect(url_for('home'))
@@ -664,8 +837,16 @@ def delete_building(building_id):
         entity_id = building_data.get('ENTITY_ID')
         building_name = building_data.get('NAME', 'Unknown')
 
+        # Collect the stored files before their document rows go away
+        file_paths = queries.get_unshared_document_files(building_id)
+
         if queries.delete_building(building_id):
-            logger.info(f"Building deleted: {building_id}")
+            invalidate_buildings_cache(entity_id)
+            invalidate_building_cache(building_id)
+            for file_path in file_paths:
+                future = background_executor.submit(azure_storage.delete_building_document, file_path)
+                future.add_done_callback(_report_file_delete_failure(file_path))
+            logger.info("Building deleted: %s", building_id)
             flash(f'Successfully deleted building: {building_name}', 'success')
         else:
             flash('Failed to delete building', 'error')
@@ -686,7 +867,7 @@ def delete_building(building_id):
 def budget_wizard(building_id):
     """Budget creation wizard"""
     try:
-        building_data = queries.get_building_by_id(building_id)
+        building_data = get_building_cached(building_id)
         if not building_data:
             flash('Building not found', 'error')
             return redirect(url_for('home'))
@@ -705,22 +886,26 @@ def budget_wizard(building_id):
 def view_budget(building_id):
     """View building budget and documents with tabs"""
     try:
-        building_data = queries.get_building_by_id(building_id)
-        if not building_data:
+        # Budget items, apartments and documents depend only on building_id, so
+        # fetch them concurrently with the building/entity lookup
+        budget_future = query_executor.submit(get_budget_items_cached, building_id)
+        apartments_future = query_executor.submit(queries.get_apartments_by_building, building_id)
+        documents_future = query_executor.submit(get_documents_cached, building_id)
+
+        # Building and its entity in one round trip
+        page_data = queries.get_building_with_entity(building_id)
+        if not page_data:
             flash('Building not found', 'error')
             return redirect(url_for('home'))
 
-        building = Building.from_dict(building_data)
-
-        # Get entity info
-        entity_data = queries.get_entity_by_id(building.entity_id)
-        entity = Entity.from_dict(entity_data) if entity_data else None
+        building = Building.from_dict(page_data['building'])
+        entity = Entity.from_dict(page_data['entity']) if page_data['entity'] else None
 
         # Get active tab from query parameter
         active_tab = request.args.get('tab', 'budget')
 
         # Get budget items
-        budget_items_data = queries.get_budget_items(building_id)
+        budget_items_data = budget_future.result()
 
         # If no budget exists, redirect to wizard
         if not budget_items_data:
@@ -728,79 +913,37 @@ def view_budget(building_id):
             return redirect(url_for('budget_wizard', building_id=building_id))
 
         # Generate 12 months starting from current month
-        today = datetime.now()
-        months = []
-        for i in range(12):
-            # Calculate year and month correctly
-            month_offset = today.month + i - 1  # -1 because months are 1-indexed
-            year_offset = month_offset // 12
-            month = (month_offset % 12) + 1
-            year = today.year + year_offset
-            month_date = datetime(year, month, 1, 0, 0, 0, 0)
-            months.append(month_date)
+        months = generate_months(12)
 
         # Organize budget data
-        budget_by_category = {}
-        for item in budget_items_data:
-            try:
-                category = item['CATEGORY']
-                month_year = item['MONTH_YEAR']
-                amount = float(item['AMOUNT'])
-
-                # Convert month_year to datetime for consistent comparison
-                if isinstance(month_year, str):
-                    try:
-                        month_year = datetime.strptime(month_year, '%Y-%m-%d')
-                    except ValueError:
-                        # Try another format if the first fails
-                        month_year = datetime.fromisoformat(month_year)
-                elif isinstance(month_year, datetime):
-                    # Already a datetime, just normalize it
-                    month_year = month_year.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-                elif hasattr(month_year, 'year') and hasattr(month_year, 'month'):
-                    # It's a date object, convert to datetime
-                    month_year = datetime(month_year.year, month_year.month, 1, 0, 0, 0, 0)
-                else:
-                    logger.error(f"Unknown month_year type: {type(month_year)}, value: {month_year}")
-                    continue
-
-                if category not in budget_by_category:
-                    budget_by_category[category] = {}
-
-                budget_by_category[category][month_year] = amount
-            except Exception as item_error:
-                logger.error(f"Error processing budget item: {item}, error: {item_error}", exc_info=True)
-                continue
-
-        logger.info(f"Loaded {len(budget_items_data)} budget items for building {building_id}")
-        logger.info(f"Generated months list: {len(months)} months, first: {months[0] if months else 'none'}, last: {months[-1] if months else 'none'}")
-
-        if budget_items_data:
-            logger.info(f"Sample budget item: {budget_items_data[0]}")
+        budget_by_category = pivot_building_budget(budget_items_data)
+
+        logger.info("Loaded %s budget items for building %s", len(budget_items_data), building_id)
+
+        # Month-key diagnostics; skipped entirely (including the sampling) unless DEBUG is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Generated months list: %s months, first: %s, last: %s",
+                         len(months), months[0] if months else 'none', months[-1] if months else 'none')
+            logger.debug("Sample budget item: %s", budget_items_data[0])
             if budget_by_category:
-                sample_category = list(budget_by_category.keys())[0]
-                sample_months = list(budget_by_category[sample_category].keys())
-                logger.info(f"Sample category '{sample_category}' has {len(sample_months)} months")
+                sample_category = next(iter(budget_by_category))
+                sample_months = list(budget_by_category[sample_category])
+                logger.debug("Sample category '%s' has %s months", sample_category, len(sample_months))
                 if sample_months:
-                    logger.info(f"First budget month key type: {type(sample_months[0])}, value: {sample_months[0]}")
-                    logger.info(f"Last budget month key type: {type(sample_months[-1])}, value: {sample_months[-1]}")
+                    logger.debug("First budget month key type: %s, value: %s", type(sample_months[0]), sample_months[0])
+                    logger.debug("Last budget month key type: %s, value: %s", type(sample_months[-1]), sample_months[-1])
                     # Check if first budget month matches any generated month
-                    matching_month = sample_months[0] in months
-                    logger.info(f"First budget month in generated months list: {matching_month}")
+                    logger.debug("First budget month in generated months list: %s", sample_months[0] in months)
 
         # Get apartments for the building
-        apartments_data = queries.get_apartments_by_building(building_id)
+        apartments_data = apartments_future.result()
 
         # Get documents
-        documents_data = queries.get_documents_by_building(building_id)
-        documents = [Document.from_dict(d) for d in documents_data]
+        documents_data = documents_future.result()
 
-        # Group documents by category
-        docs_by_category = {}
-        for doc in documents:
-            if doc.category not in docs_by_category:
-                docs_by_category[doc.category] = []
-            docs_by_category[doc.category].append(doc)
+        # Group documents by category (rows arrive ordered by category); the
+        # template only reads columns, so the raw rows are rendered directly
+        docs_by_category = {category: list(docs) for category, docs in groupby(documents_data, key=itemgetter('CATEGORY'))}
 
         categories = BudgetItem.CATEGORIES
         operating_expense_categories = BudgetItem.OPERATING_EXPENSE_CATEGORIES
@@ -819,7 +962,7 @@ def view_budget(building_id):
                              document_categories=Document.CATEGORIES,
                              required_documents=Document.REQUIRED_DOCUMENTS,
                              active_tab=active_tab,
-                             now=datetime.now)
+                             today=date.today())
     except Exception as e:
         logger.error(f"Failed to load budget: {e}", exc_info=True)
         flash('Failed to load budget', 'error')
@@ -831,9 +974,9 @@ def view_budget(building_id):
 def save_budget(building_id):
     """Save budget changes"""
     try:
-        logger.info(f"Attempting to save budget for building {building_id}")
+        logger.info("Attempting to save budget for building %s", building_id)
 
-        building_data = queries.get_building_by_id(building_id)
+        building_data = get_building_cached(building_id)
         if not building_data:
             logger.warning(f"Building {building_id} not found")
             return jsonify({'success': False, 'message': 'Building not found'}), 404
@@ -845,7 +988,7 @@ def save_budget(building_id):
             logger.warning(f"No budget data provided for building {building_id}")
             return jsonify({'success': False, 'message': 'No budget data provided'}), 400
 
-        logger.info(f"Received {len(budget_data)} budget items for building {building_id}")
+        logger.info("Received %s budget items for building %s", len(budget_data), building_id)
 
         # Prepare budget items for bulk upsert
         budget_items = []
@@ -859,10 +1002,12 @@ def save_budget(building_id):
             })
 
         # Bulk upsert
-        logger.info(f"Starting bulk upsert for {len(budget_items)} items")
+        logger.info("Starting bulk upsert for %s items", len(budget_items))
         results = queries.bulk_upsert_budget_items(budget_items)
 
-        logger.info(f"Budget saved for building {building_id}: {results}")
+        logger.info("Budget saved for building %s: %s", building_id, results)
+        if results['success'] > 0:
+            invalidate_budget_cache(building_id)
 
         # Check if any items failed
         if results['failed'] > 0:
@@ -889,28 +1034,13 @@ def save_budget(building_id):
 def update_secondary_loan_budget(building_id):
     """Add/update secondary loan budget items for a building"""
     try:
-        # Import the update function
         from utils.update_secondary_loan_budget import update_secondary_loan_budget as run_update
-        import io
-        import sys
-
-        # Capture stdout to prevent print statements from interfering with Flask
-        old_stdout = sys.stdout
-        sys.stdout = io.StringIO()
-
-        try:
-            # Run the update with auto-confirm enabled
-            success = run_update(building_id, auto_confirm=True)
-        finally:
-            # Restore stdout
-            output = sys.stdout.getvalue()
-            sys.stdout = old_stdout
 
-            # Log the output for debugging
-            if output:
-                logger.info(f"Secondary loan update output for {building_id}:\n{output}")
+        # Run the update with auto-confirm enabled; progress goes to the app log
+        success = run_update(building_id, auto_confirm=True, logger=logger)
 
         if success:
+            invalidate_budget_cache(building_id)
             return jsonify({
                 'success': True,
                 'message': 'Secondary loan budget items have been successfully added to the pro-forma.'
@@ -938,7 +1068,7 @@ def update_secondary_loan_budget(building_id):
 def view_documents(building_id):
     """List documents for a building"""
     try:
-        building_data = queries.get_building_by_id(building_id)
+        building_data = get_building_cached(building_id)
         if not building_data:
             flash('Building not found', 'error')
             return redirect(url_for('home'))
@@ -946,15 +1076,11 @@ def view_documents(building_id):
         building = Building.from_dict(building_data)
 
         # Get documents
-        documents_data = queries.get_documents_by_building(building_id)
-        documents = [Document.from_dict(d) for d in documents_data]
+        documents_data = get_documents_cached(building_id)
+        documents = list(map(Document.from_dict, documents_data))
 
-        # Group by category
-        docs_by_category = {}
-        for doc in documents:
-            if doc.category not in docs_by_category:
-                docs_by_category[doc.category] = []
-            docs_by_category[doc.category].append(doc)
+        # Group by category (rows arrive ordered by category)
+        docs_by_category = {category: list(docs) for category, docs in groupby(documents, key=attrgetter('category'))}
 
         return render_template('documents/list.html',
                              building=building,
@@ -966,12 +1092,31 @@ def view_documents(building_id):
         return redirect(url_for('view_building', building_id=building_id))
 
 
+def create_document_record(**kwargs):
+    """Write the document record for an already-stored file and return its ID.
+
+    The record is written before the upload is reported, so the documents tab
+    lists it on the redirect. If the insert fails, the stored file is removed
+    (unless an existing record shares it) and the error is re-raised.
+    """
+    document_id = str(uuid.uuid4())
+    try:
+        queries.create_document(document_id=document_id, **kwargs)
+    except Exception:
+        file_path = kwargs['file_path']
+        if not queries.is_document_file_shared(file_path, document_id):
+            azure_storage.delete_building_document(file_path)
+        raise
+    invalidate_documents_cache(kwargs['building_id'])
+    return document_id
+
+
 @app.route('/buildings/<building_id>/documents/upload', methods=['GET', 'POST'])
 @login_required
 def upload_document(building_id):
     """Upload a document"""
     try:
-        building_data = queries.get_building_by_id(building_id)
+        building_data = get_building_cached(building_id)
         if not building_data:
             flash('Building not found', 'error')
             return redirect(url_for('home'))
@@ -1006,19 +1151,16 @@ def upload_document(building_id):
             if file and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
 
-                # Upload to Azure Blob Storage or local storage
-                blob_path = azure_storage.upload_building_document(building_id, filename, file.stream)
-
-                # Get file size
-                file.stream.seek(0, 2)  # Seek to end
-                file_size = file.stream.tell()
-                file.stream.seek(0)  # Reset to beginning
+                # Upload to Azure Blob Storage or local storage, counting bytes as they stream
+                upload_stream = CountingStream(file.stream)
+                blob_path = azure_storage.upload_building_document(building_id, filename, upload_stream)
+                file_size = upload_stream.bytes_read
 
                 # Get uploaded by
                 uploaded_by = session.get('user', {}).get('email', 'Unknown')
 
                 # Create document record
-                document_id = queries.create_document(
+                document_id = create_document_record(
                     building_id=building_id,
                     category=category,
                     filename=filename,
@@ -1029,7 +1171,7 @@ def upload_document(building_id):
                     end_date=end_date
                 )
 
-                logger.info(f"Document uploaded: {filename} (ID: {document_id}) with dates: {effective_date} to {end_date}")
+                logger.info("Document uploaded: %s (ID: %s) with dates: %s to %s", filename, document_id, effective_date, end_date)
                 flash(f'Successfully uploaded: {filename}', 'success')
                 return redirect(url_for('view_budget', building_id=building_id, tab='documents'))
             else:
@@ -1044,6 +1186,89 @@ def upload_document(building_id):
         return redirect(url_for('view_building', building_id=building_id))
 
 
+@app.route('/buildings/<building_id>/documents/upload_stream', methods=['POST'])
+@login_required
+def upload_document_stream(building_id):
+    """Upload a document sent as the raw request body (used for large files)"""
+    try:
+        building_data = get_building_cached(building_id)
+        if not building_data:
+            return jsonify({'success': False, 'message': 'Building not found'}), 404
+
+        filename = secure_filename(unquote(request.headers.get('X-Filename', '')))
+        category = unquote(request.headers.get('X-Category', '')).strip()
+        effective_date = request.headers.get('X-Effective-Date', '').strip() or None
+        end_date = request.headers.get('X-End-Date', '').strip() or None
+
+        if not filename:
+            return jsonify({'success': False, 'message': 'No file selected'}), 400
+
+        if not category:
+            return jsonify({'success': False, 'message': 'Category is required'}), 400
+
+        if not allowed_file(filename):
+            return jsonify({
+                'success': False,
+                'message': 'Invalid file type. Allowed types: pdf, doc, docx, xls, xlsx, txt, png, jpg, jpeg'
+            }), 400
+
+        # Copy the body straight to storage without multipart parsing/spooling,
+        # counting the bytes actually stored (the body may be chunked)
+        upload_stream = CountingStream(request.stream)
+        blob_path = azure_storage.upload_building_document(building_id, filename, upload_stream,
+                                                           length=request.content_length)
+        file_size = upload_stream.bytes_read
+
+        uploaded_by = session.get('user', {}).get('email', 'Unknown')
+
+        document_id = create_document_record(
+            building_id=building_id,
+            category=category,
+            filename=filename,
+            file_path=blob_path,
+            file_size=file_size,
+            uploaded_by=uploaded_by,
+            effective_date=effective_date,
+            end_date=end_date
+        )
+
+        logger.info("Document uploaded (streamed): %s (ID: %s)", filename, document_id)
+        flash(f'Successfully uploaded: {filename}', 'success')
+        return jsonify({
+            'success': True,
+            'document_id': document_id,
+            'redirect': url_for('view_budget', building_id=building_id, tab='documents')
+        })
+
+    except Exception as e:
+        logger.error(f"Failed to stream-upload document: {e}", exc_info=True)
+        return jsonify({'success': False, 'message': 'Failed to upload document'}), 500
+
+
+def send_stored_document(file_path, container, filename):
+    """Send a stored document as an attachment.
+
+    Local files are handed to send_file by path, so the server can use
+    X-Sendfile (when USE_X_SENDFILE is enabled) and answer conditional/range
+    requests. Azure blobs are streamed to the client chunk by chunk.
+    """
+    if not azure_storage.use_azure:
+        return send_file(
+            os.path.abspath(file_path),
+            as_attachment=True,
+            download_name=filename,
+            mimetype='application/octet-stream',
+            conditional=True
+        )
+
+    # Stream from Azure Blob Storage
+    size, chunks = azure_storage.stream_blob(file_path, container)
+    response = Response(chunks, mimetype='application/octet-stream')
+    response.headers.set('Content-Disposition', 'attachment', filename=filename)
+    response.content_length = size
+    return response
+
+
 @app.route('/documents/<document_id>/download')
 @login_required
 def download_document(document_id):
@@ -1056,21 +1281,28 @@ def download_document(document_id):
 
         document = Document.from_dict(document_data)
 
-        # Download from Azure Blob Storage or local storage
-        file_content = azure_storage.download_blob(
-            document.file_path,
-            azure_storage.building_container if azure_storage.use_azure else None
-        )
+        # A document's content never changes under its ID, so the ID is its ETag
+        if request.if_none_match.contains(document_id):
+            response = make_response('', 304)
+            response.set_etag(document_id)
+            return response
 
-        # Create response with file content
-        from io import BytesIO
-        return send_file(
-            BytesIO(file_content),
-            as_attachment=True,
-            download_name=document.filename,
-            mimetype='application/octet-stream'
+        response = send_stored_document(
+            document.file_path,
+            azure_storage.building_container if azure_storage.use_azure else None,
+            document.filename
         )
-
+        response.set_etag(document_id)
+        response.cache_control.private = True
+        response.cache_control.max_age = 3600
+        if isinstance(document.uploaded_at, datetime):
+            response.last_modified = document.uploaded_at
+        return response
+
+    except FileNotFoundError as e:
+        logger.error(f"Document file missing: {e}")
+        flash('Document file is missing', 'error')
+        return redirect(url_for('home'))
     except Exception as e:
         logger.error(f"Failed to download document: {e}", exc_info=True)
         flash('Failed to download document', 'error')
@@ -1090,15 +1322,26 @@ def delete_document(document_id):
         document = Document.from_dict(document_data)
         building_id = document.building_id
 
-        # Delete file from Azure Blob Storage or local storage
-        azure_storage.delete_building_document(document.file_path)
-
-        # Delete document record
-        if queries.delete_document(document_id):
-            logger.info(f"Document deleted: {document_id}")
+        # Delete document record first; the stored file only goes once the record is gone
+        if not queries.delete_document(document_id):
+            flash('Failed to delete document', 'error')
+            return redirect(url_for('view_documents', building_id=building_id))
+
+        invalidate_documents_cache(building_id)
+        logger.info("Document deleted: %s", document_id)
+
+        # Delete file from Azure Blob Storage or local storage, unless another
+        # document record still points at it. Local files are content-addressed, so
+        # identical uploads share one; Azure blobs are named by building and filename,
+        # so they are shared only by re-uploads of the same name. Checked after the
+        # record delete so concurrent deletes of sharing documents can't both skip it.
+        if (queries.is_document_file_shared(document.file_path, document_id)
+                or azure_storage.delete_building_document(document.file_path)):
             flash(f'Successfully deleted: {document.filename}', 'success')
         else:
-            flash('Failed to delete document', 'error')
+            logger.error("Document %s deleted but its stored file was not removed: %s",
+                         document_id, document.file_path)
+            flash(f'Deleted {document.filename}, but its stored file could not be removed', 'error')
 
         return redirect(url_for('view_documents', building_id=building_id))
 
@@ -1117,15 +1360,14 @@ def delete_document(document_id):
 def upload_entity_document(entity_id):
     """Upload an entity document"""
     try:
-        entity_data = queries.get_entity_by_id(entity_id)
+        entity_data = get_entity_cached(entity_id)
         if not entity_data:
             flash('Entity not found', 'error')
             return redirect(url_for('home'))
 
         entity = Entity.from_dict(entity_data)
 
-        # Entity document categories
-        categories = ['Operating Agreement', 'EIN Form (SS-4)', 'Other']
+        categories = ENTITY_DOCUMENT_CATEGORIES
 
         if request.method == 'POST':
             # Check if file was uploaded
@@ -1153,13 +1395,10 @@ def upload_entity_document(entity_id):
             if file and allowed_file(file.filename):
                 filename = secure_filename(file.filename)
 
-                # Upload to Azure Blob Storage or local storage
-                blob_path = azure_storage.upload_entity_document(entity_id, filename, file.stream)
-
-                # Get file size
-                file.stream.seek(0, 2)  # Seek to end
-                file_size = file.stream.tell()
-                file.stream.seek(0)  # Reset to beginning
+                # Upload to Azure Blob Storage or local storage, counting bytes as they stream
+                upload_stream = CountingStream(file.stream)
+                blob_path = azure_storage.upload_entity_document(entity_id, filename, upload_stream)
+                file_size = upload_stream.bytes_read
 
                 # Get uploaded by
                 uploaded_by = session.get('user', {}).get('email', 'Unknown')
@@ -1174,7 +1413,7 @@ def upload_entity_document(entity_id):
                     uploaded_by=uploaded_by
                 )
 
-                logger.info(f"Entity document uploaded: {filename} (ID: {document_id})")
+                logger.info("Entity document uploaded: %s (ID: %s)", filename, document_id)
                 flash(f'Successfully uploaded: {filename}', 'success')
                 return redirect(url_for('view_entity', entity_id=entity_id))
             else:
@@ -1202,21 +1441,16 @@ def download_entity_document(document_id):
         file_path = document_data.get('FILE_PATH') or document_data.get('file_path')
         filename = document_data.get('FILENAME') or document_data.get('filename')
 
-        # Download from Azure Blob Storage or local storage
-        file_content = azure_storage.download_blob(
+        return send_stored_document(
             file_path,
-            azure_storage.entity_container if azure_storage.use_azure else None
-        )
-
-        # Create response with file content
-        from io import BytesIO
-        return send_file(
-            BytesIO(file_content),
-            as_attachment=True,
-            download_name=filename,
-            mimetype='application/octet-stream'
+            azure_storage.entity_container if azure_storage.use_azure else None,
+            filename
         )
 
+    except FileNotFoundError as e:
+        logger.error(f"Document file missing: {e}")
+        flash('Document file is missing', 'error')
+        return redirect(url_for('home'))
     except Exception as e:
         logger.error(f"Failed to download entity document: {e}", exc_info=True)
         flash('Failed to download document', 'error')
@@ -1242,7 +1476,7 @@ def delete_entity_document(document_id):
 
         # Delete document record
         if queries.delete_entity_document(document_id):
-            logger.info(f"Deleted entity document: {document_id}")
+            logger.info("Deleted entity document: %s", document_id)
             flash(f'Successfully deleted: {filename}', 'success')
         else:
             flash('Failed to delete document', 'error')
@@ -1271,37 +1505,35 @@ def shared_view(token):
 
         entity = Entity.from_dict(entity_data)
 
-        # Get buildings
-        buildings_data = queries.get_buildings_by_entity(entity.entity_id)
-        buildings = [Building.from_dict(b) for b in buildings_data]
-
-        # Get aggregate budget
-        budget_data = queries.get_entity_budget(entity.entity_id)
-
-        # Organize budget data
-        budget_by_month = {}
-        categories = set()
-
-        for item in budget_data:
-            month = item['MONTH_YEAR']
-            category = item['CATEGORY']
-            amount = float(item['TOTAL_AMOUNT'])
-
-            if month not in budget_by_month:
-                budget_by_month[month] = {}
-
-            budget_by_month[month][category] = amount
-            categories.add(category)
-
-        sorted_months = sorted(budget_by_month.keys())
-        sorted_categories = sorted(list(categories))
-
-        return render_template('shared/public_view.html',
-                             entity=entity,
-                             buildings=buildings,
-                             budget_by_month=budget_by_month,
-                             months=sorted_months,
-                             categories=sorted_categories)
+        # Revalidate against the entity's newest change; the row count makes deletions change the ETag too.
+        # The body is cached under the same version, so a cached page never carries a newer ETag than its data
+        etag = None
+        last_modified = queries.get_entity_last_modified(entity.entity_id)
+        if last_modified:
+            version = f"{entity.entity_id}:{last_modified['LAST_MODIFIED']}:{last_modified['ROW_COUNT']}"
+            etag = hashlib.blake2b(version.encode(), digest_size=16).hexdigest()
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+                response.set_etag(etag)
+                return response
+            building_records, payload = get_shared_view_cached(entity.entity_id, version)
+        else:
+            building_records, payload = load_shared_view(entity.entity_id)
+        buildings = Building.from_records(building_records)
+
+        response = make_response(render_template('shared/public_view.html',
+                                                 entity=entity,
+                                                 buildings=buildings,
+                                                 budget_by_month=payload['budget_by_month'],
+                                                 months=payload['months'],
+                                                 categories=payload['categories'],
+                                                 budget_rows=payload['rows'],
+                                                 month_totals=payload['month_totals'],
+                                                 grand_total=payload['grand_total']))
+        if etag:
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'public, max-age=60'
+        return response
 
     except Exception as e:
         logger.error(f"Failed to load shared view: {e}", exc_info=True)
@@ -1345,6 +1577,9 @@ def file_too_large(error):
 @app.template_filter('currency')
 def currency_filter(value):
     """Format value as currency"""
+    # Budget grids call this once per cell; numbers skip the float() conversion and try frame
+    if type(value) is float or type(value) is int:
+        return f"${value:,.2f}"
     try:
         return f"${float(value):,.2f}"
     except (ValueError, TypeError):
@@ -1362,6 +1597,18 @@ def month_name_filter(value):
         return str(value)
 
 
+def warm_templates():
+    """Compile every template once at startup so the first request to each page skips it"""
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        try:
+            app.jinja_env.get_template(name)
+        except Exception as e:
+            logger.error(f"Failed to precompile template {name}: {e}", exc_info=True)
+
+
+warm_templates()
+
+
 # ============================================================================
 # Run Application
 # ============================================================================
@@ -1370,7 +1617,7 @@ if __name__ == '__main__':
     port = int(os.getenv('PORT', 5000))
     debug = os.getenv('FLASK_ENV') == 'development'
 
-    logger.info(f"Starting Asset Management Platform on port {port}")
-    logger.info(f"Debug mode: {debug}")
+    logger.info("Starting Asset Management Platform on port %s", port)
+    logger.info("Debug mode: %s", debug)
 
     app.run(host='0.0.0.0', port=port, debug=debug)
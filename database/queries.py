@@ -1,18 +1,191 @@
-"""Database query functions using SnowflakeClient - Fixed for DataFrame returns"""
+"""Database query functions using SnowflakeClient - Fixed for DataFrame returns
+
+Every function here returns fully materialized data (records, scalars or a
+DataFrame) and never hands a cursor or connection back to the caller, so no
+database resource is held while a route renders its template. Keep it that
+way: do not return generators or cursors that would be consumed during render.
+"""
+import atexit
+import functools
 import logging
+import os
+import queue
+import secrets
+import threading
 import uuid
-from datetime import datetime, timedelta
+import orjson
+import pandas as pd
+from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional, Any
+from flask import g, has_app_context
 from foundation.clients import SnowflakeClient
 
 logger = logging.getLogger(__name__)
 
+# Maximum rows per MERGE ... USING VALUES statement in bulk upserts
+BULK_UPSERT_BATCH_SIZE = 10000
 
-def _escape_sql_string(value: str) -> str:
-    """Escape single quotes in SQL strings"""
-    if value is None:
-        return "NULL"
-    return value.replace("'", "''")
+# Hot per-building reads use fixed statement text with bound parameters, so
+# Snowflake sees one statement and can reuse its compiled plan and result cache
+BUDGET_ITEMS_SQL = "SELECT * FROM budget_items WHERE building_id = %s ORDER BY month_year, category"
+BUILDING_DOCUMENTS_SQL = """
+    SELECT document_id, building_id, category, filename, file_path, file_size,
+           uploaded_by, uploaded_at, effective_date, end_date
+    FROM documents
+    WHERE building_id = %s
+    ORDER BY category, uploaded_at DESC
+"""
+
+# Plain reads only build Entity/Building models, so they skip the wide columns
+# (EIN, accounting method, loan terms) that the edit forms and debt math read
+ENTITY_MODEL_COLUMNS = "entity_id, name, description, created_at, updated_at"
+BUILDING_MODEL_COLUMNS = "building_id, entity_id, name, address, created_at, updated_at"
+
+ENTITY_LIST_SQL = f"SELECT {ENTITY_MODEL_COLUMNS} FROM entities ORDER BY created_at DESC"
+ENTITY_BUILDINGS_SQL = f"SELECT {BUILDING_MODEL_COLUMNS} FROM buildings WHERE entity_id = %s ORDER BY created_at DESC"
+
+# Columns of the per-building entity budget frame
+ENTITY_BUDGET_COLUMNS = ['BUILDING_ID', 'BUILDING_NAME', 'MONTH_YEAR', 'CATEGORY', 'AMOUNT']
+
+
+# Snowflake sessions are pooled: each query checks a client out for the length
+# of one execute_query call, so at most SNOWFLAKE_POOL_SIZE sessions are open
+# no matter how many request and executor threads issue queries
+SNOWFLAKE_POOL_SIZE = int(os.getenv('SNOWFLAKE_POOL_SIZE', 10))
+SNOWFLAKE_POOL_TIMEOUT = int(os.getenv('SNOWFLAKE_POOL_TIMEOUT', 120))
+
+_pool: queue.LifoQueue = queue.LifoQueue()
+_pool_clients: List[SnowflakeClient] = []
+_pool_lock = threading.Lock()
+
+
+def _checkout() -> SnowflakeClient:
+    """Take an idle client from the pool, opening a new one while under SNOWFLAKE_POOL_SIZE"""
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        pass
+    with _pool_lock:
+        if len(_pool_clients) < SNOWFLAKE_POOL_SIZE:
+            client = SnowflakeClient()
+            _pool_clients.append(client)
+            return client
+    try:
+        return _pool.get(timeout=SNOWFLAKE_POOL_TIMEOUT)
+    except queue.Empty:
+        raise TimeoutError(f"No Snowflake connection available after {SNOWFLAKE_POOL_TIMEOUT}s")
+
+
+def _close_client(client: SnowflakeClient):
+    """Close a client, logging rather than raising if it fails"""
+    close = getattr(client, 'close', None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception as e:
+        logger.warning("Error closing Snowflake client: %s", e)
+
+
+def _discard(client: SnowflakeClient):
+    """Drop a client from the pool for good, freeing its slot for a fresh one"""
+    with _pool_lock:
+        if client in _pool_clients:
+            _pool_clients.remove(client)
+    _close_client(client)
+
+
+class _PooledClient:
+    """SnowflakeClient stand-in that runs each query on a client borrowed from the pool"""
+
+    def execute_query(self, *args, **kwargs):
+        client = _checkout()
+        try:
+            result = client.execute_query(*args, **kwargs)
+        except BaseException:
+            # The session may have dropped or expired; replace it rather than
+            # hand it out again. A plain SQL error just costs a reconnect
+            _discard(client)
+            raise
+        _pool.put(client)
+        return result
+
+
+_pooled_client = _PooledClient()
+
+
+def _run_in_transaction(statements: List[tuple]):
+    """Run (sql, params) statements as one transaction on a single pooled session"""
+    client = _checkout()
+    try:
+        client.execute_query("BEGIN")
+        for sql, params in statements:
+            client.execute_query(sql, params)
+        client.execute_query("COMMIT")
+    except BaseException:
+        try:
+            client.execute_query("ROLLBACK")
+        except Exception as e:
+            logger.warning("Rollback failed: %s", e)
+        # Never hand a session with a possibly open transaction to another query
+        _discard(client)
+        raise
+    _pool.put(client)
+
+
+def _get_client() -> _PooledClient:
+    """Return the shared pooled client used by every query function"""
+    return _pooled_client
+
+
+def close_pool():
+    """Close every client the pool has opened"""
+    with _pool_lock:
+        clients = list(_pool_clients)
+        _pool_clients.clear()
+    while True:
+        try:
+            _pool.get_nowait()
+        except queue.Empty:
+            break
+    for client in clients:
+        _close_client(client)
+
+
+atexit.register(close_pool)
+
+
+def request_cached(fn):
+    """Memoize a by-ID lookup on flask.g for the rest of the current request
+
+    Misses (None) are not stored, and calls outside an app context (e.g. on
+    query_executor threads) go straight to the database. Mutators call
+    fn.forget(id) so a later read in the same request sees the change.
+    """
+    @functools.wraps(fn)
+    def wrapper(key):
+        if not has_app_context():
+            return fn(key)
+        cache = g.setdefault('_query_cache', {})
+        cache_key = (fn.__name__, key)
+        if cache_key in cache:
+            return cache[cache_key]
+        value = fn(key)
+        if value is not None:
+            cache[cache_key] = value
+        return value
+
+    def forget(key):
+        if has_app_context():
+            g.get('_query_cache', {}).pop((fn.__name__, key), None)
+
+    wrapper.forget = forget
+    return wrapper
+
+
+def _placeholders(count: int) -> str:
+    """Bind placeholders for a SQL IN (...) clause with count values"""
+    return ', '.join(['%s'] * count)
 
 
 def _df_to_records(df) -> List[Dict[str, Any]]:
@@ -28,6 +201,18 @@ def _df_to_records(df) -> List[Dict[str, Any]]:
         return df if isinstance(df, list) else []
 
 
+def _rows_affected(results) -> Optional[int]:
+    """Row count from the result Snowflake returns for a DML statement, or None if not reported
+
+    MERGE reports inserted and updated rows in separate columns; they are summed.
+    """
+    records = _df_to_records(results)
+    if not records:
+        return None
+    counts = [int(value) for key, value in records[0].items() if str(key).lower().startswith('number of rows')]
+    return sum(counts) if counts else None
+
+
 # ============================================================================
 # Entity Queries
 # ============================================================================
@@ -35,21 +220,21 @@ def _df_to_records(df) -> List[Dict[str, Any]]:
 def get_all_entities() -> List[Dict[str, Any]]:
     """Get all entities ordered by creation date"""
     try:
-        snowflake = SnowflakeClient()
-        query = "SELECT * FROM entities ORDER BY created_at DESC"
-        results = snowflake.execute_query(query)
+        snowflake = _get_client()
+        results = snowflake.execute_query(ENTITY_LIST_SQL)
         return _df_to_records(results)
     except Exception as e:
         logger.error(f"Failed to get entities: {e}", exc_info=True)
         return []
 
 
+@request_cached
 def get_entity_by_id(entity_id: str) -> Optional[Dict[str, Any]]:
     """Get a specific entity by ID"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"SELECT * FROM entities WHERE entity_id = '{entity_id}'"
-        results = snowflake.execute_query(query)
+        snowflake = _get_client()
+        query = f"SELECT {ENTITY_MODEL_COLUMNS} FROM entities WHERE entity_id = %s"
+        results = snowflake.execute_query(query, (entity_id,))
         records = _df_to_records(results)
         return records[0] if records else None
     except Exception as e:
@@ -60,46 +245,17 @@ def get_entity_by_id(entity_id: str) -> Optional[Dict[str, Any]]:
 def create_entity(name: str, description: str = None, ein: str = None, accounting_method: str = None) -> str:
     """Create a new entity"""
     try:
-        snowflake = SnowflakeClient()
+        snowflake = _get_client()
         entity_id = str(uuid.uuid4())
-        name_escaped = _escape_sql_string(name)
-
-        # Handle description
-        if description:
-            desc_escaped = _escape_sql_string(description)
-            desc_sql = f"'{desc_escaped}'"
-        else:
-            desc_sql = 'NULL'
-
-        # Handle EIN
-        if ein:
-            ein_escaped = _escape_sql_string(ein)
-            ein_sql = f"'{ein_escaped}'"
-        else:
-            ein_sql = 'NULL'
-
-        # Handle accounting method
-        if accounting_method:
-            accounting_escaped = _escape_sql_string(accounting_method)
-            accounting_sql = f"'{accounting_escaped}'"
-        else:
-            accounting_sql = 'NULL'
 
-        query = f"""
+        query = """
             INSERT INTO entities (entity_id, name, description, ein, accounting_method)
-            VALUES ('{entity_id}', '{name_escaped}', {desc_sql}, {ein_sql}, {accounting_sql})
+            VALUES (%s, %s, %s, %s, %s)
         """
 
-        logger.info(f"Executing INSERT query for entity: {name}")
-        result = snowflake.execute_query(query)
-        logger.info(f"INSERT completed. Result type: {type(result)}")
-
-        # Verify the insert
-        verify_query = f"SELECT COUNT(*) as cnt FROM entities WHERE entity_id = '{entity_id}'"
-        verify = snowflake.execute_query(verify_query)
-        logger.info(f"Verification query result: {verify}")
-
-        logger.info(f"✓ Created entity: {name} (ID: {entity_id})")
+        snowflake.execute_query(query, (entity_id, name, description or None, ein or None,
+                                        accounting_method or None))
+        logger.info("Created entity: %s (ID: %s)", name, entity_id)
         return entity_id
     except Exception as e:
         logger.error(f"Failed to create entity {name}: {e}", exc_info=True)
@@ -107,44 +263,27 @@ def create_entity(name: str, description: str = None, ein: str = None, accountin
 
 
 def update_entity(entity_id: str, name: str, description: str = None, ein: str = None, accounting_method: str = None) -> bool:
-    """Update an existing entity"""
+    """Update an existing entity; returns False if it failed or no entity matched"""
+    get_entity_by_id.forget(entity_id)
     try:
-        snowflake = SnowflakeClient()
-        name_escaped = _escape_sql_string(name)
-
-        # Handle description
-        if description:
-            desc_escaped = _escape_sql_string(description)
-            desc_sql = f"'{desc_escaped}'"
-        else:
-            desc_sql = 'NULL'
-
-        # Handle EIN
-        if ein:
-            ein_escaped = _escape_sql_string(ein)
-            ein_sql = f"'{ein_escaped}'"
-        else:
-            ein_sql = 'NULL'
-
-        # Handle accounting method
-        if accounting_method:
-            accounting_escaped = _escape_sql_string(accounting_method)
-            accounting_sql = f"'{accounting_escaped}'"
-        else:
-            accounting_sql = 'NULL'
+        snowflake = _get_client()
 
-        query = f"""
+        query = """
             UPDATE entities SET
-                name = '{name_escaped}',
-                description = {desc_sql},
-                ein = {ein_sql},
-                accounting_method = {accounting_sql},
+                name = %s,
+                description = %s,
+                ein = %s,
+                accounting_method = %s,
                 updated_at = CURRENT_TIMESTAMP()
-            WHERE entity_id = '{entity_id}'
+            WHERE entity_id = %s
         """
 
-        snowflake.execute_query(query)
-        logger.info(f"Updated entity: {entity_id}")
+        results = snowflake.execute_query(query, (name, description or None, ein or None,
+                                                  accounting_method or None, entity_id))
+        if _rows_affected(results) == 0:
+            logger.warning("Entity not found for update: %s", entity_id)
+            return False
+        logger.info("Updated entity: %s", entity_id)
         return True
     except Exception as e:
         logger.error(f"Failed to update entity {entity_id}: {e}", exc_info=True)
@@ -153,22 +292,91 @@ def update_entity(entity_id: str, name: str, description: str = None, ein: str =
 
 def delete_entity(entity_id: str) -> bool:
     """Delete an entity and all associated data (cascade)"""
+    get_entity_by_id.forget(entity_id)
     try:
-        snowflake = SnowflakeClient()
-        buildings = get_buildings_by_entity(entity_id)
-
-        for building in buildings:
-            delete_building(building['BUILDING_ID'])
-
-        query = f"DELETE FROM entities WHERE entity_id = '{entity_id}'"
-        snowflake.execute_query(query)
-        logger.info(f"Deleted entity: {entity_id}")
+        # Cascade by subquery so the statement count doesn't grow with the building
+        # count, in one transaction so a failure part-way leaves the entity intact
+        entity_buildings = "SELECT building_id FROM buildings WHERE entity_id = %s"
+        params = (entity_id,)
+        _run_in_transaction([
+            (f"DELETE FROM budget_items WHERE building_id IN ({entity_buildings})", params),
+            (f"DELETE FROM documents WHERE building_id IN ({entity_buildings})", params),
+            ("DELETE FROM buildings WHERE entity_id = %s", params),
+            ("DELETE FROM entities WHERE entity_id = %s", params),
+        ])
+        logger.info("Deleted entity: %s", entity_id)
         return True
     except Exception as e:
         logger.error(f"Failed to delete entity {entity_id}: {e}", exc_info=True)
         return False
 
 
+def _parse_variant(value) -> Any:
+    """Parse a VARIANT/ARRAY column value that the driver returned as JSON text"""
+    if value is None:
+        return None
+    if isinstance(value, (str, bytes)):
+        return orjson.loads(value)
+    return value
+
+
+def _parse_timestamps(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert CREATED_AT/UPDATED_AT strings from a VARIANT object back to datetimes"""
+    for key in ('CREATED_AT', 'UPDATED_AT'):
+        value = record.get(key)
+        if isinstance(value, str):
+            try:
+                record[key] = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+    return record
+
+
+def get_entity_page(entity_id: str) -> Optional[Dict[str, Any]]:
+    """Get an entity, its buildings and its current share token in one round trip"""
+    try:
+        snowflake = _get_client()
+        query = f"""
+            WITH e AS (
+                SELECT {ENTITY_MODEL_COLUMNS} FROM entities WHERE entity_id = %s
+            ),
+            b AS (
+                SELECT ARRAY_AGG(OBJECT_CONSTRUCT(*)) WITHIN GROUP (ORDER BY created_at DESC) AS buildings_json
+                FROM (SELECT {BUILDING_MODEL_COLUMNS} FROM buildings WHERE entity_id = %s)
+            ),
+            t AS (
+                SELECT token
+                FROM share_tokens
+                WHERE entity_id = %s
+                  AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP())
+                ORDER BY created_at DESC
+                LIMIT 1
+            )
+            SELECT
+                OBJECT_CONSTRUCT(e.*) AS entity_json,
+                b.buildings_json,
+                t.token AS share_token
+            FROM e
+            CROSS JOIN b
+            LEFT JOIN t ON TRUE
+        """
+        results = snowflake.execute_query(query, (entity_id, entity_id, entity_id))
+        records = _df_to_records(results)
+        if not records:
+            return None
+
+        record = records[0]
+        buildings = _parse_variant(record.get('BUILDINGS_JSON')) or []
+        return {
+            'entity': _parse_timestamps(_parse_variant(record.get('ENTITY_JSON'))),
+            'buildings': [_parse_timestamps(b) for b in buildings],
+            'share_token': record.get('SHARE_TOKEN')
+        }
+    except Exception as e:
+        logger.error(f"Failed to get entity page for {entity_id}: {e}", exc_info=True)
+        return None
+
+
 # ============================================================================
 # Building Queries
 # ============================================================================
@@ -176,21 +384,21 @@ def delete_entity(entity_id: str) -> bool:
 def get_buildings_by_entity(entity_id: str) -> List[Dict[str, Any]]:
     """Get all buildings for an entity"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"SELECT * FROM buildings WHERE entity_id = '{entity_id}' ORDER BY created_at DESC"
-        results = snowflake.execute_query(query)
+        snowflake = _get_client()
+        results = snowflake.execute_query(ENTITY_BUILDINGS_SQL, (entity_id,))
         return _df_to_records(results)
     except Exception as e:
         logger.error(f"Failed to get buildings for entity {entity_id}: {e}", exc_info=True)
         return []
 
 
+@request_cached
 def get_building_by_id(building_id: str) -> Optional[Dict[str, Any]]:
     """Get a specific building by ID"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"SELECT * FROM buildings WHERE building_id = '{building_id}'"
-        results = snowflake.execute_query(query)
+        snowflake = _get_client()
+        query = f"SELECT {BUILDING_MODEL_COLUMNS} FROM buildings WHERE building_id = %s"
+        results = snowflake.execute_query(query, (building_id,))
         records = _df_to_records(results)
         return records[0] if records else None
     except Exception as e:
@@ -198,154 +406,92 @@ def get_building_by_id(building_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def get_building_with_entity(building_id: str) -> Optional[Dict[str, Any]]:
+    """Get a building and its parent entity in one round trip"""
+    try:
+        snowflake = _get_client()
+        query = """
+            SELECT b.*, OBJECT_CONSTRUCT(e.*) AS entity_json
+            FROM buildings b
+            LEFT JOIN entities e ON e.entity_id = b.entity_id
+            WHERE b.building_id = %s
+        """
+        results = snowflake.execute_query(query, (building_id,))
+        records = _df_to_records(results)
+        if not records:
+            return None
+
+        building = records[0]
+        entity = _parse_variant(building.pop('ENTITY_JSON', None))
+        return {
+            'building': building,
+            'entity': _parse_timestamps(entity) if entity else None
+        }
+    except Exception as e:
+        logger.error(f"Failed to get building with entity {building_id}: {e}", exc_info=True)
+        return None
+
+
 def create_building(entity_id: str, name: str, address: str = None) -> str:
     """Create a new building"""
     try:
-        snowflake = SnowflakeClient()
+        snowflake = _get_client()
         building_id = str(uuid.uuid4())
-        name_escaped = _escape_sql_string(name)
-
-        if address:
-            address_escaped = _escape_sql_string(address)
-            query = f"INSERT INTO buildings (building_id, entity_id, name, address) VALUES ('{building_id}', '{entity_id}', '{name_escaped}', '{address_escaped}')"
-        else:
-            query = f"INSERT INTO buildings (building_id, entity_id, name, address) VALUES ('{building_id}', '{entity_id}', '{name_escaped}', NULL)"
 
-        snowflake.execute_query(query)
-        logger.info(f"Created building: {name} (ID: {building_id})")
+        query = "INSERT INTO buildings (building_id, entity_id, name, address) VALUES (%s, %s, %s, %s)"
+        snowflake.execute_query(query, (building_id, entity_id, name, address or None))
+        logger.info("Created building: %s (ID: %s)", name, building_id)
         return building_id
     except Exception as e:
         logger.error(f"Failed to create building {name}: {e}", exc_info=True)
         raise
 
 
-def update_building(building_id: str, name: str, address: str = None,
-                   purchase_price: str = None, original_loan_amount: str = None,
-                   loan_origination_date: str = None, loan_duration_years: str = None,
-                   interest_rate: str = None, additional_principal_paid: str = None,
-                   loan_number: str = None, lender: str = None, loan_login_username: str = None,
-                   secondary_loan_amount: str = None, secondary_loan_origination_date: str = None,
-                   secondary_loan_duration_years: str = None, secondary_interest_rate: str = None,
-                   secondary_additional_principal_paid: str = None,
-                   secondary_loan_number: str = None, secondary_lender: str = None,
-                   secondary_loan_login_username: str = None) -> bool:
-    """Update an existing building"""
+# Editable building columns and the type each form value is converted to
+BUILDING_COLUMNS = {
+    'name': str,
+    'address': str,
+    'purchase_price': float,
+    'original_loan_amount': float,
+    'loan_origination_date': str,
+    'loan_duration_years': float,
+    'interest_rate': float,
+    'additional_principal_paid': float,
+    'loan_number': str,
+    'lender': str,
+    'loan_login_username': str,
+    'secondary_loan_amount': float,
+    'secondary_loan_origination_date': str,
+    'secondary_loan_duration_years': float,
+    'secondary_interest_rate': float,
+    'secondary_additional_principal_paid': float,
+    'secondary_loan_number': str,
+    'secondary_lender': str,
+    'secondary_loan_login_username': str,
+}
+
+
+def update_building(building_id: str, **fields) -> bool:
+    """Update the given columns of a building (see BUILDING_COLUMNS); empty values clear a column"""
+    get_building_by_id.forget(building_id)
     try:
-        snowflake = SnowflakeClient()
-        name_escaped = _escape_sql_string(name)
-
-        # Build the SET clause
-        set_parts = [f"name = '{name_escaped}'"]
-
-        # Address
-        if address:
-            address_escaped = _escape_sql_string(address)
-            set_parts.append(f"address = '{address_escaped}'")
-        else:
-            set_parts.append("address = NULL")
-
-        # Debt fields
-        if purchase_price:
-            set_parts.append(f"purchase_price = {purchase_price}")
-        else:
-            set_parts.append("purchase_price = NULL")
-
-        if original_loan_amount:
-            set_parts.append(f"original_loan_amount = {original_loan_amount}")
-        else:
-            set_parts.append("original_loan_amount = NULL")
-
-        if loan_origination_date:
-            set_parts.append(f"loan_origination_date = '{loan_origination_date}'")
-        else:
-            set_parts.append("loan_origination_date = NULL")
-
-        if loan_duration_years:
-            set_parts.append(f"loan_duration_years = {loan_duration_years}")
-        else:
-            set_parts.append("loan_duration_years = NULL")
-
-        if interest_rate:
-            set_parts.append(f"interest_rate = {interest_rate}")
-        else:
-            set_parts.append("interest_rate = NULL")
-
-        if additional_principal_paid:
-            set_parts.append(f"additional_principal_paid = {additional_principal_paid}")
-        else:
-            set_parts.append("additional_principal_paid = NULL")
-
-        # Primary loan reference fields
-        if loan_number:
-            loan_number_escaped = _escape_sql_string(loan_number)
-            set_parts.append(f"loan_number = '{loan_number_escaped}'")
-        else:
-            set_parts.append("loan_number = NULL")
-
-        if lender:
-            lender_escaped = _escape_sql_string(lender)
-            set_parts.append(f"lender = '{lender_escaped}'")
-        else:
-            set_parts.append("lender = NULL")
-
-        if loan_login_username:
-            loan_login_username_escaped = _escape_sql_string(loan_login_username)
-            set_parts.append(f"loan_login_username = '{loan_login_username_escaped}'")
-        else:
-            set_parts.append("loan_login_username = NULL")
-
-        # Secondary loan fields
-        if secondary_loan_amount:
-            set_parts.append(f"secondary_loan_amount = {secondary_loan_amount}")
-        else:
-            set_parts.append("secondary_loan_amount = NULL")
-
-        if secondary_loan_origination_date:
-            set_parts.append(f"secondary_loan_origination_date = '{secondary_loan_origination_date}'")
-        else:
-            set_parts.append("secondary_loan_origination_date = NULL")
-
-        if secondary_loan_duration_years:
-            set_parts.append(f"secondary_loan_duration_years = {secondary_loan_duration_years}")
-        else:
-            set_parts.append("secondary_loan_duration_years = NULL")
-
-        if secondary_interest_rate:
-            set_parts.append(f"secondary_interest_rate = {secondary_interest_rate}")
-        else:
-            set_parts.append("secondary_interest_rate = NULL")
-
-        if secondary_additional_principal_paid:
-            set_parts.append(f"secondary_additional_principal_paid = {secondary_additional_principal_paid}")
-        else:
-            set_parts.append("secondary_additional_principal_paid = NULL")
-
-        # Secondary loan reference fields
-        if secondary_loan_number:
-            secondary_loan_number_escaped = _escape_sql_string(secondary_loan_number)
-            set_parts.append(f"secondary_loan_number = '{secondary_loan_number_escaped}'")
-        else:
-            set_parts.append("secondary_loan_number = NULL")
-
-        if secondary_lender:
-            secondary_lender_escaped = _escape_sql_string(secondary_lender)
-            set_parts.append(f"secondary_lender = '{secondary_lender_escaped}'")
-        else:
-            set_parts.append("secondary_lender = NULL")
-
-        if secondary_loan_login_username:
-            secondary_loan_login_username_escaped = _escape_sql_string(secondary_loan_login_username)
-            set_parts.append(f"secondary_loan_login_username = '{secondary_loan_login_username_escaped}'")
-        else:
-            set_parts.append("secondary_loan_login_username = NULL")
-
-        set_parts.append("updated_at = CURRENT_TIMESTAMP()")
-
-        set_clause = ", ".join(set_parts)
-        query = f"UPDATE buildings SET {set_clause} WHERE building_id = '{building_id}'"
-
-        snowflake.execute_query(query)
-        logger.info(f"Updated building: {building_id}")
+        unknown = fields.keys() - BUILDING_COLUMNS.keys()
+        if unknown:
+            raise ValueError(f"Unknown building columns: {sorted(unknown)}")
+        if not fields:
+            return True
+
+        snowflake = _get_client()
+
+        set_clause = ", ".join(f"{column} = %s" for column in fields)
+        query = f"UPDATE buildings SET {set_clause}, updated_at = CURRENT_TIMESTAMP() WHERE building_id = %s"
+        params = tuple(
+            BUILDING_COLUMNS[column](value) if value not in (None, '') else None
+            for column, value in fields.items()
+        ) + (building_id,)
+
+        snowflake.execute_query(query, params)
+        logger.info("Updated building: %s", building_id)
         return True
     except Exception as e:
         logger.error(f"Failed to update building {building_id}: {e}", exc_info=True)
@@ -354,14 +500,16 @@ def update_building(building_id: str, name: str, address: str = None,
 
 def delete_building(building_id: str) -> bool:
     """Delete a building and all associated data"""
+    get_building_by_id.forget(building_id)
     try:
-        snowflake = SnowflakeClient()
+        snowflake = _get_client()
 
-        snowflake.execute_query(f"DELETE FROM budget_items WHERE building_id = '{building_id}'")
-        snowflake.execute_query(f"DELETE FROM documents WHERE building_id = '{building_id}'")
-        snowflake.execute_query(f"DELETE FROM buildings WHERE building_id = '{building_id}'")
+        params = (building_id,)
+        snowflake.execute_query("DELETE FROM budget_items WHERE building_id = %s", params)
+        snowflake.execute_query("DELETE FROM documents WHERE building_id = %s", params)
+        snowflake.execute_query("DELETE FROM buildings WHERE building_id = %s", params)
 
-        logger.info(f"Deleted building: {building_id}")
+        logger.info("Deleted building: %s", building_id)
         return True
     except Exception as e:
         logger.error(f"Failed to delete building {building_id}: {e}", exc_info=True)
@@ -372,45 +520,78 @@ def delete_building(building_id: str) -> bool:
 # Budget Queries
 # ============================================================================
 
+def _month_start(value) -> Optional[datetime]:
+    """Normalize a MONTH_YEAR value (str, date or datetime) to a first-of-month datetime"""
+    if isinstance(value, str):
+        try:
+            value = date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    if isinstance(value, date):
+        return datetime(value.year, value.month, 1)
+    return None
+
+
+def _with_month_start(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Normalize MONTH_YEAR on budget rows once, so callers can key on it directly"""
+    for record in records:
+        record['MONTH_YEAR'] = _month_start(record.get('MONTH_YEAR'))
+    return records
+
 def get_budget_items(building_id: str) -> List[Dict[str, Any]]:
     """Get all budget items for a building"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"SELECT * FROM budget_items WHERE building_id = '{building_id}' ORDER BY month_year, category"
-        results = snowflake.execute_query(query)
-        return _df_to_records(results)
+        snowflake = _get_client()
+        results = snowflake.execute_query(BUDGET_ITEMS_SQL, (building_id,))
+        return _with_month_start(_df_to_records(results))
     except Exception as e:
         logger.error(f"Failed to get budget items for building {building_id}: {e}", exc_info=True)
         return []
 
 
+def _empty_building_metrics() -> Dict[str, Any]:
+    return {
+        'annual_noi': 0,
+        'annual_cashflow': 0,
+        'annual_revenue': 0,
+        'estimated_value': 0
+    }
+
+
 def get_building_financial_metrics(building_id: str) -> Dict[str, Any]:
     """Get financial metrics for a building (annual NOI, cashflow, etc.)"""
+    return get_building_financial_metrics_bulk([building_id]).get(building_id, _empty_building_metrics())
+
+
+def get_building_financial_metrics_bulk(building_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Get financial metrics for many buildings in one query, keyed by building_id"""
+    if not building_ids:
+        return {}
+
     try:
-        snowflake = SnowflakeClient()
+        snowflake = _get_client()
         # Get only the next 12 months starting from current month
         query = f"""
             SELECT
+                building_id,
                 category,
                 SUM(amount) as annual_amount
             FROM budget_items
-            WHERE building_id = '{building_id}'
+            WHERE building_id IN ({_placeholders(len(building_ids))})
                 AND category IN ('Net Operating Income', 'Cashflow', 'Revenue')
                 AND month_year >= DATE_TRUNC('MONTH', CURRENT_DATE())
                 AND month_year < DATEADD('MONTH', 12, DATE_TRUNC('MONTH', CURRENT_DATE()))
-            GROUP BY category
+            GROUP BY building_id, category
         """
-        results = snowflake.execute_query(query)
+        results = snowflake.execute_query(query, tuple(building_ids))
         records = _df_to_records(results)
 
-        metrics = {
-            'annual_noi': 0,
-            'annual_cashflow': 0,
-            'annual_revenue': 0,
-            'estimated_value': 0
-        }
+        metrics_by_building = {building_id: _empty_building_metrics() for building_id in building_ids}
 
         for record in records:
+            metrics = metrics_by_building.get(record.get('BUILDING_ID'))
+            if metrics is None:
+                continue
             category = record.get('CATEGORY', '')
             amount = float(record.get('ANNUAL_AMOUNT', 0))
 
@@ -424,15 +605,10 @@ def get_building_financial_metrics(building_id: str) -> Dict[str, Any]:
             elif category == 'Revenue':
                 metrics['annual_revenue'] = amount
 
-        return metrics
+        return metrics_by_building
     except Exception as e:
-        logger.error(f"Failed to get financial metrics for building {building_id}: {e}", exc_info=True)
-        return {
-            'annual_noi': 0,
-            'annual_cashflow': 0,
-            'annual_revenue': 0,
-            'estimated_value': 0
-        }
+        logger.error(f"Failed to get financial metrics for buildings {building_ids}: {e}", exc_info=True)
+        return {}
 
 
 def _calculate_amortization_principal_paid(principal: float, annual_rate: float,
@@ -469,16 +645,140 @@ def _calculate_amortization_principal_paid(principal: float, annual_rate: float,
     return total_principal_paid
 
 
+def _parse_loan_date(value) -> Optional[date]:
+    """Normalize a loan origination date value (date, datetime or 'YYYY-MM-DD')"""
+    if not value:
+        return None
+    if isinstance(value, date):
+        # Already a datetime.date (or datetime.datetime) object
+        return value
+    if isinstance(value, str):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            return None
+    if hasattr(value, 'date'):
+        # datetime-like object (e.g. pandas Timestamp)
+        return value.date()
+    return None
+
+
+def _loan_from_principal_payment(record: Optional[Dict[str, Any]]) -> float:
+    """Derive the original loan from the first principal payment's 'balance:' note"""
+    if not record:
+        return 0
+    notes = record.get('NOTES', '')
+    if isinstance(notes, str) and 'balance:' in notes.lower():
+        try:
+            balance_str = notes.lower().split('balance:')[1].strip()
+            balance_str = balance_str.replace('$', '').replace(',', '').split()[0]
+            remaining_after_first = float(balance_str)
+            first_payment = float(record.get('AMOUNT', 0))
+            return remaining_after_first + first_payment
+        except (ValueError, IndexError, TypeError):
+            pass
+    return 0
+
+
+def _remaining_balance(principal: float, origination_date: Optional[date], duration_years,
+                       annual_rate: Optional[float], additional_principal_paid: float,
+                       current_date: date) -> tuple:
+    """Return (principal_paid, current_debt) for one loan as of current_date"""
+    principal_paid = 0
+    current_debt = principal
+
+    # If we have complete loan info, calculate using amortization
+    if principal > 0 and origination_date and duration_years and annual_rate:
+        months_elapsed = (current_date.year - origination_date.year) * 12 + \
+                         (current_date.month - origination_date.month)
+
+        if months_elapsed > 0:
+            principal_paid = _calculate_amortization_principal_paid(
+                principal, annual_rate, duration_years, months_elapsed
+            )
+            # Add any additional principal payments made
+            principal_paid += additional_principal_paid
+            current_debt = max(0, principal - principal_paid)
+
+    return principal_paid, current_debt
+
+
+def _empty_building_debt() -> Dict[str, Any]:
+    return {
+        'original_loan': 0,
+        'current_debt': 0,
+        'total_principal_paid': 0,
+        'loan_origination_date': None,
+        'primary_loan': 0,
+        'primary_current_debt': 0,
+        'secondary_loan': 0,
+        'secondary_current_debt': 0
+    }
+
+
+def _calculate_building_debt(building_data: Optional[Dict[str, Any]],
+                             first_principal_payment: Optional[Dict[str, Any]],
+                             current_date: date) -> Dict[str, Any]:
+    """Calculate the current debt position from a building's loan columns"""
+    building_data = building_data or {}
+
+    original_loan = float(building_data.get('ORIGINAL_LOAN_AMOUNT') or 0)
+    loan_origination_date = _parse_loan_date(building_data.get('LOAN_ORIGINATION_DATE'))
+    loan_duration_years = building_data.get('LOAN_DURATION_YEARS')
+    interest_rate_val = building_data.get('INTEREST_RATE')
+    interest_rate = float(interest_rate_val) if interest_rate_val else None
+    additional_principal_paid = float(building_data.get('ADDITIONAL_PRINCIPAL_PAID') or 0)
+
+    secondary_loan = float(building_data.get('SECONDARY_LOAN_AMOUNT') or 0)
+    secondary_loan_origination_date = _parse_loan_date(building_data.get('SECONDARY_LOAN_ORIGINATION_DATE'))
+    secondary_loan_duration_years = building_data.get('SECONDARY_LOAN_DURATION_YEARS')
+    secondary_interest_rate_val = building_data.get('SECONDARY_INTEREST_RATE')
+    secondary_interest_rate = float(secondary_interest_rate_val) if secondary_interest_rate_val else None
+    secondary_additional_principal_paid = float(building_data.get('SECONDARY_ADDITIONAL_PRINCIPAL_PAID') or 0)
+
+    # If no building debt info, try to extract from budget items
+    if original_loan == 0:
+        original_loan = _loan_from_principal_payment(first_principal_payment)
+
+    primary_principal_paid, primary_current_debt = _remaining_balance(
+        original_loan, loan_origination_date, loan_duration_years, interest_rate,
+        additional_principal_paid, current_date
+    )
+    secondary_principal_paid, secondary_current_debt = _remaining_balance(
+        secondary_loan, secondary_loan_origination_date, secondary_loan_duration_years,
+        secondary_interest_rate, secondary_additional_principal_paid, current_date
+    )
+
+    # Total debt is primary + secondary
+    return {
+        'original_loan': original_loan + secondary_loan,  # Total of both loans
+        'current_debt': primary_current_debt + secondary_current_debt,  # Combined current debt
+        'total_principal_paid': primary_principal_paid + secondary_principal_paid,  # Combined principal paid
+        'loan_origination_date': loan_origination_date,  # Primary loan origination date
+        'primary_loan': original_loan,
+        'primary_current_debt': primary_current_debt,
+        'secondary_loan': secondary_loan,
+        'secondary_current_debt': secondary_current_debt
+    }
+
+
 def get_building_current_debt(building_id: str) -> Dict[str, Any]:
     """Calculate current debt position for a building"""
+    return get_building_current_debt_bulk([building_id]).get(building_id, _empty_building_debt())
+
+
+def get_building_current_debt_bulk(building_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Calculate current debt positions for many buildings, keyed by building_id"""
+    if not building_ids:
+        return {}
+
     try:
-        snowflake = SnowflakeClient()
-        from datetime import datetime
-        from dateutil.relativedelta import relativedelta
+        snowflake = _get_client()
 
-        # First, get building debt information from the buildings table (both primary and secondary loans)
+        # Building debt information from the buildings table (both primary and secondary loans)
         building_query = f"""
             SELECT
+                building_id,
                 original_loan_amount,
                 loan_origination_date,
                 loan_duration_years,
@@ -490,261 +790,149 @@ def get_building_current_debt(building_id: str) -> Dict[str, Any]:
                 secondary_interest_rate,
                 secondary_additional_principal_paid
             FROM buildings
-            WHERE building_id = '{building_id}'
+            WHERE building_id IN ({_placeholders(len(building_ids))})
         """
-        building_results = snowflake.execute_query(building_query)
-        building_records = _df_to_records(building_results)
-
-        original_loan = 0
-        loan_origination_date = None
-        loan_duration_years = None
-        interest_rate = None
-        additional_principal_paid = 0
-
-        secondary_loan = 0
-        secondary_loan_origination_date = None
-        secondary_loan_duration_years = None
-        secondary_interest_rate = None
-        secondary_additional_principal_paid = 0
-
-        if building_records and len(building_records) > 0:
-            building_data = building_records[0]
-            original_loan_val = building_data.get('ORIGINAL_LOAN_AMOUNT')
-            if original_loan_val:
-                original_loan = float(original_loan_val)
-
-            # Get loan origination date
-            loan_orig_val = building_data.get('LOAN_ORIGINATION_DATE')
-            if loan_orig_val:
-                from datetime import date as date_type
-                if isinstance(loan_orig_val, date_type):
-                    # Already a datetime.date object
-                    loan_origination_date = loan_orig_val
-                elif isinstance(loan_orig_val, str):
-                    try:
-                        loan_origination_date = datetime.strptime(loan_orig_val, '%Y-%m-%d').date()
-                    except:
-                        pass
-                elif hasattr(loan_orig_val, 'date'):
-                    # datetime.datetime object
-                    loan_origination_date = loan_orig_val.date()
-
-            # Get loan duration and interest rate
-            loan_duration_years = building_data.get('LOAN_DURATION_YEARS')
-            interest_rate_val = building_data.get('INTEREST_RATE')
-            if interest_rate_val:
-                interest_rate = float(interest_rate_val)
-
-            # Get additional principal paid
-            additional_principal_val = building_data.get('ADDITIONAL_PRINCIPAL_PAID')
-            if additional_principal_val:
-                additional_principal_paid = float(additional_principal_val)
-
-            # Get secondary loan information
-            secondary_loan_val = building_data.get('SECONDARY_LOAN_AMOUNT')
-            if secondary_loan_val:
-                secondary_loan = float(secondary_loan_val)
-
-            # Get secondary loan origination date
-            secondary_loan_orig_val = building_data.get('SECONDARY_LOAN_ORIGINATION_DATE')
-            if secondary_loan_orig_val:
-                from datetime import date as date_type
-                if isinstance(secondary_loan_orig_val, date_type):
-                    secondary_loan_origination_date = secondary_loan_orig_val
-                elif isinstance(secondary_loan_orig_val, str):
-                    try:
-                        secondary_loan_origination_date = datetime.strptime(secondary_loan_orig_val, '%Y-%m-%d').date()
-                    except:
-                        pass
-                elif hasattr(secondary_loan_orig_val, 'date'):
-                    secondary_loan_origination_date = secondary_loan_orig_val.date()
-
-            # Get secondary loan duration and interest rate
-            secondary_loan_duration_years = building_data.get('SECONDARY_LOAN_DURATION_YEARS')
-            secondary_interest_rate_val = building_data.get('SECONDARY_INTEREST_RATE')
-            if secondary_interest_rate_val:
-                secondary_interest_rate = float(secondary_interest_rate_val)
-
-            # Get secondary additional principal paid
-            secondary_additional_principal_val = building_data.get('SECONDARY_ADDITIONAL_PRINCIPAL_PAID')
-            if secondary_additional_principal_val:
-                secondary_additional_principal_paid = float(secondary_additional_principal_val)
-
-        # If no building debt info, try to extract from budget items
-        if original_loan == 0:
-            query = f"""
+        building_records = {
+            record['BUILDING_ID']: record
+            for record in _df_to_records(snowflake.execute_query(building_query, tuple(building_ids)))
+        }
+
+        # Buildings without loan info fall back to their first principal payment
+        fallback_ids = [
+            building_id for building_id in building_ids
+            if not (building_records.get(building_id) or {}).get('ORIGINAL_LOAN_AMOUNT')
+        ]
+        first_payments = {}
+        if fallback_ids:
+            payment_query = f"""
                 SELECT
+                    building_id,
                     month_year,
                     amount,
                     notes
                 FROM budget_items
-                WHERE building_id = '{building_id}'
+                WHERE building_id IN ({_placeholders(len(fallback_ids))})
                     AND category = 'Principal Payment'
-                ORDER BY month_year ASC
+                QUALIFY ROW_NUMBER() OVER (PARTITION BY building_id ORDER BY month_year ASC) = 1
             """
-            results = snowflake.execute_query(query)
-            records = _df_to_records(results)
-
-            if records:
-                # Extract original loan from first payment's notes
-                first_record = records[0]
-                notes = first_record.get('NOTES', '')
-                if notes and 'balance:' in notes.lower():
-                    try:
-                        balance_str = notes.lower().split('balance:')[1].strip()
-                        balance_str = balance_str.replace('$', '').replace(',', '').split()[0]
-                        remaining_after_first = float(balance_str)
-                        first_payment = float(first_record.get('AMOUNT', 0))
-                        original_loan = remaining_after_first + first_payment
-                    except:
-                        pass
-
-        # Calculate current debt (primary + secondary)
-        current_date = datetime.now().date()
-
-        # Calculate primary loan debt
-        primary_principal_paid = 0
-        primary_current_debt = original_loan
-
-        # If we have complete primary loan info, calculate using amortization
-        if original_loan > 0 and loan_origination_date and loan_duration_years and interest_rate:
-            # Calculate months elapsed since loan origination
-            months_elapsed = (current_date.year - loan_origination_date.year) * 12 + \
-                           (current_date.month - loan_origination_date.month)
-
-            if months_elapsed > 0:
-                primary_principal_paid = _calculate_amortization_principal_paid(
-                    original_loan, interest_rate, loan_duration_years, months_elapsed
-                )
-                # Add any additional principal payments made
-                primary_principal_paid += additional_principal_paid
-                primary_current_debt = original_loan - primary_principal_paid
-                primary_current_debt = max(0, primary_current_debt)
-
-        # Calculate secondary loan debt
-        secondary_principal_paid = 0
-        secondary_current_debt = secondary_loan
-
-        # If we have complete secondary loan info, calculate using amortization
-        if secondary_loan > 0 and secondary_loan_origination_date and secondary_loan_duration_years and secondary_interest_rate:
-            # Calculate months elapsed since secondary loan origination
-            secondary_months_elapsed = (current_date.year - secondary_loan_origination_date.year) * 12 + \
-                                      (current_date.month - secondary_loan_origination_date.month)
-
-            if secondary_months_elapsed > 0:
-                secondary_principal_paid = _calculate_amortization_principal_paid(
-                    secondary_loan, secondary_interest_rate, secondary_loan_duration_years, secondary_months_elapsed
-                )
-                # Add any additional principal payments made on secondary loan
-                secondary_principal_paid += secondary_additional_principal_paid
-                secondary_current_debt = secondary_loan - secondary_principal_paid
-                secondary_current_debt = max(0, secondary_current_debt)
-
-        # Total debt is primary + secondary
-        total_principal_paid = primary_principal_paid + secondary_principal_paid
-        current_debt = primary_current_debt + secondary_current_debt
-        total_original_loan = original_loan + secondary_loan
+            first_payments = {
+                record['BUILDING_ID']: record
+                for record in _df_to_records(snowflake.execute_query(payment_query, tuple(fallback_ids)))
+            }
 
+        current_date = datetime.now().date()
         return {
-            'original_loan': total_original_loan,  # Total of both loans
-            'current_debt': current_debt,  # Combined current debt
-            'total_principal_paid': total_principal_paid,  # Combined principal paid
-            'loan_origination_date': loan_origination_date,  # Primary loan origination date
-            'primary_loan': original_loan,
-            'primary_current_debt': primary_current_debt,
-            'secondary_loan': secondary_loan,
-            'secondary_current_debt': secondary_current_debt
+            building_id: _calculate_building_debt(
+                building_records.get(building_id), first_payments.get(building_id), current_date
+            )
+            for building_id in building_ids
         }
 
     except Exception as e:
-        logger.error(f"Failed to calculate current debt for building {building_id}: {e}", exc_info=True)
-        return {
-            'original_loan': 0,
-            'current_debt': 0,
-            'total_principal_paid': 0,
-            'loan_origination_date': None,
-            'primary_loan': 0,
-            'primary_current_debt': 0,
-            'secondary_loan': 0,
-            'secondary_current_debt': 0
-        }
+        logger.error(f"Failed to calculate current debt for buildings {building_ids}: {e}", exc_info=True)
+        return {}
+
+
+def _empty_entity_metrics(building_count: int = 0) -> Dict[str, Any]:
+    return {
+        'total_value': 0,
+        'total_debt': 0,
+        'total_equity': 0,
+        'annual_cashflow': 0,
+        'annual_noi': 0,
+        'building_count': building_count
+    }
 
 
 def get_entity_financial_metrics(entity_id: str) -> Dict[str, Any]:
     """Get aggregated financial metrics for an entity (all buildings combined)"""
+    return get_financial_metrics_for_entities([entity_id]).get(entity_id, _empty_entity_metrics())
+
+
+def get_financial_metrics_for_entities(entity_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Get aggregated financial metrics for many entities, keyed by entity_id.
+
+    Uses a fixed number of queries (buildings, metrics, debt) regardless of
+    how many entities or buildings are involved.
+    """
+    if not entity_ids:
+        return {}
+
     try:
-        snowflake = SnowflakeClient()
-
-        # Get all buildings for this entity
-        buildings = get_buildings_by_entity(entity_id)
-
-        metrics = {
-            'total_value': 0,
-            'total_debt': 0,
-            'total_equity': 0,
-            'annual_cashflow': 0,
-            'annual_noi': 0,
-            'building_count': len(buildings)
-        }
+        snowflake = _get_client()
+
+        # Get all buildings for these entities
+        query = f"""
+            SELECT building_id, entity_id
+            FROM buildings
+            WHERE entity_id IN ({_placeholders(len(entity_ids))})
+        """
+        buildings = _df_to_records(snowflake.execute_query(query, tuple(entity_ids)))
+        building_ids = [building['BUILDING_ID'] for building in buildings]
+
+        building_metrics = get_building_financial_metrics_bulk(building_ids)
+        building_debt = get_building_current_debt_bulk(building_ids)
+
+        metrics_by_entity = {entity_id: _empty_entity_metrics() for entity_id in entity_ids}
 
         # Sum up metrics from all buildings
         for building in buildings:
-            building_id = building.get('BUILDING_ID')
+            metrics = metrics_by_entity.get(building['ENTITY_ID'])
+            if metrics is None:
+                continue
+            building_id = building['BUILDING_ID']
+            metrics['building_count'] += 1
 
-            # Get financial metrics
-            building_metrics = get_building_financial_metrics(building_id)
-            metrics['total_value'] += building_metrics.get('estimated_value', 0)
-            metrics['annual_cashflow'] += building_metrics.get('annual_cashflow', 0)
-            metrics['annual_noi'] += building_metrics.get('annual_noi', 0)
+            financials = building_metrics.get(building_id, {})
+            metrics['total_value'] += financials.get('estimated_value', 0)
+            metrics['annual_cashflow'] += financials.get('annual_cashflow', 0)
+            metrics['annual_noi'] += financials.get('annual_noi', 0)
 
-            # Get debt position
-            debt_info = get_building_current_debt(building_id)
-            metrics['total_debt'] += debt_info.get('current_debt', 0)
+            metrics['total_debt'] += building_debt.get(building_id, {}).get('current_debt', 0)
 
         # Calculate equity
-        metrics['total_equity'] = metrics['total_value'] - metrics['total_debt']
+        for metrics in metrics_by_entity.values():
+            metrics['total_equity'] = metrics['total_value'] - metrics['total_debt']
 
-        return metrics
+        return metrics_by_entity
 
     except Exception as e:
-        logger.error(f"Failed to get entity financial metrics for {entity_id}: {e}", exc_info=True)
-        return {
-            'total_value': 0,
-            'total_debt': 0,
-            'total_equity': 0,
-            'annual_cashflow': 0,
-            'annual_noi': 0,
-            'building_count': 0
-        }
+        logger.error(f"Failed to get entity financial metrics for {entity_ids}: {e}", exc_info=True)
+        return {}
 
 
 def get_entity_budget(entity_id: str) -> List[Dict[str, Any]]:
     """Get aggregated budget for all buildings in an entity"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"""
+        snowflake = _get_client()
+        query = """
             SELECT
                 bi.month_year,
                 bi.category,
                 SUM(bi.amount) as total_amount
             FROM budget_items bi
             JOIN buildings b ON bi.building_id = b.building_id
-            WHERE b.entity_id = '{entity_id}'
+            WHERE b.entity_id = %s
             GROUP BY bi.month_year, bi.category
             ORDER BY bi.month_year, bi.category
         """
-        results = snowflake.execute_query(query)
-        return _df_to_records(results)
+        results = snowflake.execute_query(query, (entity_id,))
+        return _with_month_start(_df_to_records(results))
     except Exception as e:
         logger.error(f"Failed to get entity budget for {entity_id}: {e}", exc_info=True)
         return []
 
 
-def get_entity_budget_with_buildings(entity_id: str) -> Dict[str, Any]:
-    """Get aggregated budget for entity with drill-down by building"""
+def get_entity_budget_frame(entity_id: str) -> pd.DataFrame:
+    """Get aggregated budget for entity with drill-down by building, as a DataFrame
+
+    Unlike the other queries here, this returns a DataFrame (columns
+    ENTITY_BUDGET_COLUMNS) rather than a list of records, so pivot_entity_budget
+    can work column-wise. MONTH_YEAR is normalized to month-start timestamps.
+    """
     try:
-        snowflake = SnowflakeClient()
-        query = f"""
+        snowflake = _get_client()
+        query = """
             SELECT
                 b.building_id,
                 b.name as building_name,
@@ -753,41 +941,49 @@ def get_entity_budget_with_buildings(entity_id: str) -> Dict[str, Any]:
                 SUM(bi.amount) as amount
             FROM budget_items bi
             JOIN buildings b ON bi.building_id = b.building_id
-            WHERE b.entity_id = '{entity_id}'
+            WHERE b.entity_id = %s
             GROUP BY b.building_id, b.name, bi.month_year, bi.category
             ORDER BY b.name, bi.month_year, bi.category
         """
-        results = snowflake.execute_query(query)
-        return _df_to_records(results)
+        results = snowflake.execute_query(query, (entity_id,))
+        if results is None or len(results) == 0:
+            return pd.DataFrame(columns=ENTITY_BUDGET_COLUMNS)
+        df = pd.DataFrame(results, columns=ENTITY_BUDGET_COLUMNS)
+        df['MONTH_YEAR'] = pd.to_datetime(df['MONTH_YEAR'], errors='coerce').dt.to_period('M').dt.to_timestamp()
+        return df
     except Exception as e:
         logger.error(f"Failed to get entity budget with buildings for {entity_id}: {e}", exc_info=True)
-        return []
+        return pd.DataFrame(columns=ENTITY_BUDGET_COLUMNS)
 
 
 def upsert_budget_item(building_id: str, month_year: str, category: str, amount: float, notes: str = None) -> bool:
     """Create or update a budget item"""
     try:
-        snowflake = SnowflakeClient()
+        snowflake = _get_client()
         budget_item_id = str(uuid.uuid4())
-        notes_escaped = _escape_sql_string(notes) if notes else 'NULL'
 
-        query = f"""
+        query = """
             MERGE INTO budget_items AS target
-            USING (SELECT '{building_id}' AS building_id, '{month_year}' AS month_year, '{category}' AS category) AS source
+            USING (
+                SELECT %s AS budget_item_id, %s AS building_id, %s AS month_year,
+                       %s AS category, %s AS amount, %s AS notes
+            ) AS source
             ON target.building_id = source.building_id
                 AND target.month_year = source.month_year
                 AND target.category = source.category
             WHEN MATCHED THEN
                 UPDATE SET
-                    amount = {amount},
-                    notes = '{notes_escaped}',
+                    amount = source.amount,
+                    notes = source.notes,
                     updated_at = CURRENT_TIMESTAMP()
             WHEN NOT MATCHED THEN
                 INSERT (budget_item_id, building_id, month_year, category, amount, notes)
-                VALUES ('{budget_item_id}', '{building_id}', '{month_year}', '{category}', {amount}, '{notes_escaped}')
+                VALUES (source.budget_item_id, source.building_id, source.month_year,
+                        source.category, source.amount, source.notes)
         """
 
-        snowflake.execute_query(query)
+        snowflake.execute_query(query, (budget_item_id, building_id, month_year, category,
+                                        float(amount), notes or None))
         return True
     except Exception as e:
         logger.error(f"Failed to upsert budget item: {e}", exc_info=True)
@@ -795,34 +991,38 @@ def upsert_budget_item(building_id: str, month_year: str, category: str, amount:
 
 
 def bulk_upsert_budget_items(budget_items: List[Dict[str, Any]]) -> Dict[str, int]:
-    """Bulk insert/update budget items using optimized batch processing"""
+    """Bulk insert/update budget items with one MERGE ... USING VALUES per batch"""
     results = {'success': 0, 'failed': 0}
 
     if not budget_items:
         return results
 
     try:
-        snowflake = SnowflakeClient()
-
-        # Build VALUES clauses for the source table
-        source_values = []
-        for item in budget_items:
-            budget_item_id = str(uuid.uuid4())
-            building_id = item['building_id']
-            month_year = item['month_year']
-            category = item['category']
-            amount = float(item['amount'])
-            notes = _escape_sql_string(item.get('notes', ''))
-
-            # Use NULL for empty notes, otherwise wrap in quotes
-            notes_value = 'NULL' if not notes or notes == 'NULL' else f"'{notes}'"
-
-            source_values.append(
-                f"('{budget_item_id}', '{building_id}', '{month_year}', '{category}', {amount}, {notes_value})"
-            )
+        snowflake = _get_client()
 
-        # Create the MERGE query with all values at once
-        values_clause = ',\n                '.join(source_values)
+        # MERGE rejects a source with two rows for the same target row, so the
+        # last submitted value for each (building, month, category) wins
+        latest = {
+            (item['building_id'], item['month_year'], item['category']): item
+            for item in budget_items
+        }
+
+        # Build each source row's bind values once, in MERGE column order
+        rows = [
+            (str(uuid.uuid4()), item['building_id'], item['month_year'], item['category'],
+             float(item['amount']), item.get('notes') or None)
+            for item in latest.values()
+        ]
+    except Exception as e:
+        logger.error(f"Failed to prepare bulk budget upsert: {e}", exc_info=True)
+        results['failed'] = len(budget_items)
+        return results
+
+    # Snowflake caps a VALUES clause at 16,384 rows
+    for offset in range(0, len(rows), BULK_UPSERT_BATCH_SIZE):
+        batch = rows[offset:offset + BULK_UPSERT_BATCH_SIZE]
+        values_clause = ',\n                '.join(['(%s, %s, %s, %s, %s, %s)'] * len(batch))
+        params = tuple(value for row in batch for value in row)
 
         query = f"""
             MERGE INTO budget_items AS target
@@ -844,16 +1044,16 @@ def bulk_upsert_budget_items(budget_items: List[Dict[str, Any]]) -> Dict[str, in
                         source.amount, source.notes, CURRENT_TIMESTAMP(), CURRENT_TIMESTAMP())
         """
 
-        logger.info(f"Executing bulk upsert for {len(budget_items)} budget items")
-        snowflake.execute_query(query)
-        results['success'] = len(budget_items)
-        logger.info(f"Bulk budget upsert completed: {results['success']} items processed")
-
-    except Exception as e:
-        logger.error(f"Failed to bulk upsert budget items: {e}", exc_info=True)
-        logger.error(f"Query that failed: {query if 'query' in locals() else 'Query not constructed'}")
-        results['failed'] = len(budget_items)
+        try:
+            logger.info("Executing bulk upsert for %s budget items", len(batch))
+            affected = _rows_affected(snowflake.execute_query(query, params))
+            results['success'] += len(batch) if affected is None else affected
+        except Exception as e:
+            logger.error(f"Failed to bulk upsert budget items: {e}", exc_info=True)
+            logger.error(f"Query that failed: {query}")
+            results['failed'] += len(batch)
 
+    logger.info("Bulk budget upsert completed: %s items processed", results['success'])
     return results
 
 
@@ -864,21 +1064,21 @@ def bulk_upsert_budget_items(budget_items: List[Dict[str, Any]]) -> Dict[str, in
 def get_documents_by_building(building_id: str) -> List[Dict[str, Any]]:
     """Get all documents for a building"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"SELECT * FROM documents WHERE building_id = '{building_id}' ORDER BY category, uploaded_at DESC"
-        results = snowflake.execute_query(query)
+        snowflake = _get_client()
+        results = snowflake.execute_query(BUILDING_DOCUMENTS_SQL, (building_id,))
         return _df_to_records(results)
     except Exception as e:
         logger.error(f"Failed to get documents for building {building_id}: {e}", exc_info=True)
         return []
 
 
+@request_cached
 def get_document_by_id(document_id: str) -> Optional[Dict[str, Any]]:
     """Get a specific document by ID"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"SELECT * FROM documents WHERE document_id = '{document_id}'"
-        results = snowflake.execute_query(query)
+        snowflake = _get_client()
+        query = "SELECT * FROM documents WHERE document_id = %s"
+        results = snowflake.execute_query(query, (document_id,))
         records = _df_to_records(results)
         return records[0] if records else None
     except Exception as e:
@@ -887,47 +1087,99 @@ def get_document_by_id(document_id: str) -> Optional[Dict[str, Any]]:
 
 
 def create_document(building_id: str, category: str, filename: str, file_path: str,
-                   file_size: int, uploaded_by: str, effective_date: str = None, end_date: str = None) -> str:
-    """Create a new document record"""
+                   file_size: int, uploaded_by: str, effective_date: str = None, end_date: str = None,
+                   document_id: str = None) -> str:
+    """Create a new document record (document_id is generated if not given)"""
     try:
-        snowflake = SnowflakeClient()
-        document_id = str(uuid.uuid4())
-        category_escaped = _escape_sql_string(category)
-        filename_escaped = _escape_sql_string(filename)
-        filepath_escaped = _escape_sql_string(file_path)
-        uploadedby_escaped = _escape_sql_string(uploaded_by)
-
-        # Handle dates
-        if effective_date:
-            effective_date_sql = f"'{effective_date}'"
-        else:
-            effective_date_sql = 'NULL'
-
-        if end_date:
-            end_date_sql = f"'{end_date}'"
-        else:
-            end_date_sql = 'NULL'
+        snowflake = _get_client()
+        document_id = document_id or str(uuid.uuid4())
 
-        query = f"""
+        query = """
             INSERT INTO documents (document_id, building_id, category, filename, file_path, file_size, uploaded_by, effective_date, end_date)
-            VALUES ('{document_id}', '{building_id}', '{category_escaped}', '{filename_escaped}', '{filepath_escaped}', {file_size}, '{uploadedby_escaped}', {effective_date_sql}, {end_date_sql})
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
         """
 
-        snowflake.execute_query(query)
-        logger.info(f"Created document: {filename} (ID: {document_id})")
+        snowflake.execute_query(query, (document_id, building_id, category, filename, file_path, file_size,
+                                        uploaded_by, effective_date or None, end_date or None))
+        logger.info("Created document: %s (ID: %s)", filename, document_id)
         return document_id
     except Exception as e:
         logger.error(f"Failed to create document {filename}: {e}", exc_info=True)
         raise
 
 
+def is_document_file_shared(file_path: str, document_id: str) -> bool:
+    """Check whether any other document record points at the same stored file"""
+    try:
+        snowflake = _get_client()
+        query = """
+            SELECT COUNT(*) AS cnt
+            FROM documents
+            WHERE file_path = %s
+              AND document_id != %s
+        """
+        results = snowflake.execute_query(query, (file_path, document_id))
+        records = _df_to_records(results)
+        return bool(records) and int(records[0]['CNT']) > 0
+    except Exception as e:
+        logger.error(f"Failed to check shared file for document {document_id}: {e}", exc_info=True)
+        # Err on the side of keeping the file
+        return True
+
+
+def get_unshared_document_files(building_id: str) -> List[str]:
+    """Stored file paths of a building's documents that no other building's documents point at"""
+    try:
+        snowflake = _get_client()
+        query = """
+            SELECT DISTINCT d.file_path
+            FROM documents d
+            WHERE d.building_id = %s
+              AND NOT EXISTS (
+                  SELECT 1 FROM documents o
+                  WHERE o.file_path = d.file_path AND o.building_id != d.building_id
+              )
+        """
+        results = snowflake.execute_query(query, (building_id,))
+        return [record['FILE_PATH'] for record in _df_to_records(results)]
+    except Exception as e:
+        logger.error(f"Failed to get document files for building {building_id}: {e}", exc_info=True)
+        # Err on the side of keeping the files
+        return []
+
+
+def get_unshared_entity_document_files(entity_id: str) -> List[str]:
+    """Stored file paths of an entity's building documents that no other entity's documents point at"""
+    try:
+        snowflake = _get_client()
+        query = """
+            SELECT DISTINCT d.file_path
+            FROM documents d
+            JOIN buildings b ON d.building_id = b.building_id
+            WHERE b.entity_id = %s
+              AND NOT EXISTS (
+                  SELECT 1
+                  FROM documents o
+                  JOIN buildings ob ON o.building_id = ob.building_id
+                  WHERE o.file_path = d.file_path AND ob.entity_id != b.entity_id
+              )
+        """
+        results = snowflake.execute_query(query, (entity_id,))
+        return [record['FILE_PATH'] for record in _df_to_records(results)]
+    except Exception as e:
+        logger.error(f"Failed to get document files for entity {entity_id}: {e}", exc_info=True)
+        # Err on the side of keeping the files
+        return []
+
+
 def delete_document(document_id: str) -> bool:
     """Delete a document record"""
+    get_document_by_id.forget(document_id)
     try:
-        snowflake = SnowflakeClient()
-        query = f"DELETE FROM documents WHERE document_id = '{document_id}'"
-        snowflake.execute_query(query)
-        logger.info(f"Deleted document: {document_id}")
+        snowflake = _get_client()
+        query = "DELETE FROM documents WHERE document_id = %s"
+        snowflake.execute_query(query, (document_id,))
+        logger.info("Deleted document: %s", document_id)
         return True
     except Exception as e:
         logger.error(f"Failed to delete document {document_id}: {e}", exc_info=True)
@@ -941,15 +1193,14 @@ def delete_document(document_id: str) -> bool:
 def create_share_token(entity_id: str, expires_days: int = 365) -> str:
     """Generate a shareable token for an entity"""
     try:
-        snowflake = SnowflakeClient()
-        import secrets
+        snowflake = _get_client()
         token = secrets.token_urlsafe(32)
         expires_at = datetime.now() + timedelta(days=expires_days)
         expires_str = expires_at.strftime('%Y-%m-%d %H:%M:%S')
 
-        query = f"INSERT INTO share_tokens (token, entity_id, expires_at) VALUES ('{token}', '{entity_id}', '{expires_str}')"
-        snowflake.execute_query(query)
-        logger.info(f"Created share token for entity {entity_id}")
+        query = "INSERT INTO share_tokens (token, entity_id, expires_at) VALUES (%s, %s, %s)"
+        snowflake.execute_query(query, (token, entity_id, expires_str))
+        logger.info("Created share token for entity %s", entity_id)
         return token
     except Exception as e:
         logger.error(f"Failed to create share token: {e}", exc_info=True)
@@ -959,15 +1210,15 @@ def create_share_token(entity_id: str, expires_days: int = 365) -> str:
 def get_entity_by_share_token(token: str) -> Optional[Dict[str, Any]]:
     """Get entity by share token (if valid and not expired)"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"""
-            SELECT e.*
+        snowflake = _get_client()
+        query = """
+            SELECT e.entity_id, e.name, e.description, e.created_at, e.updated_at
             FROM entities e
             JOIN share_tokens st ON e.entity_id = st.entity_id
-            WHERE st.token = '{token}'
+            WHERE st.token = %s
               AND (st.expires_at IS NULL OR st.expires_at > CURRENT_TIMESTAMP())
         """
-        results = snowflake.execute_query(query)
+        results = snowflake.execute_query(query, (token,))
         records = _df_to_records(results)
         return records[0] if records else None
     except Exception as e:
@@ -975,19 +1226,44 @@ def get_entity_by_share_token(token: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def get_entity_last_modified(entity_id: str) -> Optional[Dict[str, Any]]:
+    """Get the latest updated_at and row count across an entity, its buildings and budget items"""
+    try:
+        snowflake = _get_client()
+        query = """
+            SELECT MAX(updated_at) AS last_modified, COUNT(*) AS row_count
+            FROM (
+                SELECT updated_at FROM entities WHERE entity_id = %s
+                UNION ALL
+                SELECT updated_at FROM buildings WHERE entity_id = %s
+                UNION ALL
+                SELECT bi.updated_at
+                FROM budget_items bi
+                JOIN buildings b ON bi.building_id = b.building_id
+                WHERE b.entity_id = %s
+            )
+        """
+        results = snowflake.execute_query(query, (entity_id, entity_id, entity_id))
+        records = _df_to_records(results)
+        return records[0] if records else None
+    except Exception as e:
+        logger.error(f"Failed to get last modified time for entity {entity_id}: {e}", exc_info=True)
+        return None
+
+
 def get_existing_share_token(entity_id: str) -> Optional[str]:
     """Get existing valid share token for an entity"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"""
+        snowflake = _get_client()
+        query = """
             SELECT token
             FROM share_tokens
-            WHERE entity_id = '{entity_id}'
+            WHERE entity_id = %s
               AND (expires_at IS NULL OR expires_at > CURRENT_TIMESTAMP())
             ORDER BY created_at DESC
             LIMIT 1
         """
-        results = snowflake.execute_query(query)
+        results = snowflake.execute_query(query, (entity_id,))
         records = _df_to_records(results)
         return records[0]['TOKEN'] if records else None
     except Exception as e:
@@ -998,10 +1274,10 @@ def get_existing_share_token(entity_id: str) -> Optional[str]:
 def revoke_share_tokens(entity_id: str) -> bool:
     """Revoke all share tokens for an entity"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"DELETE FROM share_tokens WHERE entity_id = '{entity_id}'"
-        snowflake.execute_query(query)
-        logger.info(f"Revoked share tokens for entity {entity_id}")
+        snowflake = _get_client()
+        query = "DELETE FROM share_tokens WHERE entity_id = %s"
+        snowflake.execute_query(query, (entity_id,))
+        logger.info("Revoked share tokens for entity %s", entity_id)
         return True
     except Exception as e:
         logger.error(f"Failed to revoke share tokens: {e}", exc_info=True)
@@ -1015,9 +1291,9 @@ def revoke_share_tokens(entity_id: str) -> bool:
 def get_apartments_by_building(building_id: str) -> List[Dict[str, Any]]:
     """Get all apartments for a building"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"SELECT * FROM apartments WHERE building_id = '{building_id}' ORDER BY unit_number"
-        results = snowflake.execute_query(query)
+        snowflake = _get_client()
+        query = "SELECT * FROM apartments WHERE building_id = %s ORDER BY unit_number"
+        results = snowflake.execute_query(query, (building_id,))
         return _df_to_records(results)
     except Exception as e:
         logger.error(f"Failed to get apartments for building {building_id}: {e}", exc_info=True)
@@ -1027,17 +1303,16 @@ def get_apartments_by_building(building_id: str) -> List[Dict[str, Any]]:
 def create_apartment(building_id: str, unit_number: str, monthly_rent: float) -> str:
     """Create a new apartment"""
     try:
-        snowflake = SnowflakeClient()
+        snowflake = _get_client()
         apartment_id = str(uuid.uuid4())
-        unit_escaped = _escape_sql_string(unit_number)
 
-        query = f"""
+        query = """
             INSERT INTO apartments (apartment_id, building_id, unit_number, monthly_rent)
-            VALUES ('{apartment_id}', '{building_id}', '{unit_escaped}', {monthly_rent})
+            VALUES (%s, %s, %s, %s)
         """
 
-        snowflake.execute_query(query)
-        logger.info(f"Created apartment: {unit_number} (ID: {apartment_id})")
+        snowflake.execute_query(query, (apartment_id, building_id, unit_number, monthly_rent))
+        logger.info("Created apartment: %s (ID: %s)", unit_number, apartment_id)
         return apartment_id
     except Exception as e:
         logger.error(f"Failed to create apartment {unit_number}: {e}", exc_info=True)
@@ -1047,19 +1322,18 @@ def create_apartment(building_id: str, unit_number: str, monthly_rent: float) ->
 def update_apartment(apartment_id: str, unit_number: str, monthly_rent: float) -> bool:
     """Update an existing apartment"""
     try:
-        snowflake = SnowflakeClient()
-        unit_escaped = _escape_sql_string(unit_number)
+        snowflake = _get_client()
 
-        query = f"""
+        query = """
             UPDATE apartments
-            SET unit_number = '{unit_escaped}',
-                monthly_rent = {monthly_rent},
+            SET unit_number = %s,
+                monthly_rent = %s,
                 updated_at = CURRENT_TIMESTAMP()
-            WHERE apartment_id = '{apartment_id}'
+            WHERE apartment_id = %s
         """
 
-        snowflake.execute_query(query)
-        logger.info(f"Updated apartment: {apartment_id}")
+        snowflake.execute_query(query, (unit_number, monthly_rent, apartment_id))
+        logger.info("Updated apartment: %s", apartment_id)
         return True
     except Exception as e:
         logger.error(f"Failed to update apartment {apartment_id}: {e}", exc_info=True)
@@ -1069,10 +1343,10 @@ def update_apartment(apartment_id: str, unit_number: str, monthly_rent: float) -
 def delete_apartment(apartment_id: str) -> bool:
     """Delete an apartment"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"DELETE FROM apartments WHERE apartment_id = '{apartment_id}'"
-        snowflake.execute_query(query)
-        logger.info(f"Deleted apartment: {apartment_id}")
+        snowflake = _get_client()
+        query = "DELETE FROM apartments WHERE apartment_id = %s"
+        snowflake.execute_query(query, (apartment_id,))
+        logger.info("Deleted apartment: %s", apartment_id)
         return True
     except Exception as e:
         logger.error(f"Failed to delete apartment {apartment_id}: {e}", exc_info=True)
@@ -1086,9 +1360,9 @@ def delete_apartment(apartment_id: str) -> bool:
 def get_entity_documents(entity_id: str) -> List[Dict[str, Any]]:
     """Get all documents for an entity"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"SELECT * FROM entity_documents WHERE entity_id = '{entity_id}' ORDER BY uploaded_at DESC"
-        results = snowflake.execute_query(query)
+        snowflake = _get_client()
+        query = "SELECT * FROM entity_documents WHERE entity_id = %s ORDER BY uploaded_at DESC"
+        results = snowflake.execute_query(query, (entity_id,))
         return _df_to_records(results)
     except Exception as e:
         logger.error(f"Failed to get documents for entity {entity_id}: {e}", exc_info=True)
@@ -1098,20 +1372,16 @@ def get_entity_documents(entity_id: str) -> List[Dict[str, Any]]:
 def create_entity_document(entity_id: str, category: str, filename: str, file_path: str, file_size: int, uploaded_by: str) -> str:
     """Create a new entity document record"""
     try:
-        snowflake = SnowflakeClient()
+        snowflake = _get_client()
         document_id = str(uuid.uuid4())
-        category_escaped = _escape_sql_string(category)
-        filename_escaped = _escape_sql_string(filename)
-        filepath_escaped = _escape_sql_string(file_path)
-        uploadedby_escaped = _escape_sql_string(uploaded_by)
 
-        query = f"""
+        query = """
             INSERT INTO entity_documents (document_id, entity_id, category, filename, file_path, file_size, uploaded_by)
-            VALUES ('{document_id}', '{entity_id}', '{category_escaped}', '{filename_escaped}', '{filepath_escaped}', {file_size}, '{uploadedby_escaped}')
+            VALUES (%s, %s, %s, %s, %s, %s, %s)
         """
 
-        snowflake.execute_query(query)
-        logger.info(f"Created entity document: {filename} (ID: {document_id})")
+        snowflake.execute_query(query, (document_id, entity_id, category, filename, file_path, file_size, uploaded_by))
+        logger.info("Created entity document: %s (ID: %s)", filename, document_id)
         return document_id
     except Exception as e:
         logger.error(f"Failed to create entity document {filename}: {e}", exc_info=True)
@@ -1120,23 +1390,25 @@ def create_entity_document(entity_id: str, category: str, filename: str, file_pa
 
 def delete_entity_document(document_id: str) -> bool:
     """Delete an entity document record"""
+    get_entity_document_by_id.forget(document_id)
     try:
-        snowflake = SnowflakeClient()
-        query = f"DELETE FROM entity_documents WHERE document_id = '{document_id}'"
-        snowflake.execute_query(query)
-        logger.info(f"Deleted entity document: {document_id}")
+        snowflake = _get_client()
+        query = "DELETE FROM entity_documents WHERE document_id = %s"
+        snowflake.execute_query(query, (document_id,))
+        logger.info("Deleted entity document: %s", document_id)
         return True
     except Exception as e:
         logger.error(f"Failed to delete entity document {document_id}: {e}", exc_info=True)
         return False
 
 
+@request_cached
 def get_entity_document_by_id(document_id: str) -> Optional[Dict[str, Any]]:
     """Get a specific entity document by ID"""
     try:
-        snowflake = SnowflakeClient()
-        query = f"SELECT * FROM entity_documents WHERE document_id = '{document_id}'"
-        results = snowflake.execute_query(query)
+        snowflake = _get_client()
+        query = "SELECT * FROM entity_documents WHERE document_id = %s"
+        results = snowflake.execute_query(query, (document_id,))
         records = _df_to_records(results)
         return records[0] if records else None
     except Exception as e:
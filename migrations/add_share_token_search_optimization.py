@@ -0,0 +1,38 @@
+"""
+Migration: Enable search optimization for share token lookups
+
+/shared/<token> looks up share_tokens by token, and the entity page looks up
+the newest token by entity_id. Both are point lookups, which search
+optimization serves without scanning every micro-partition (requires
+Snowflake Enterprise Edition or higher).
+"""
+from foundation.clients import SnowflakeClient
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def run_migration():
+    """Add equality search optimization on share_tokens(token, entity_id)"""
+    try:
+        snowflake = SnowflakeClient()
+
+        logger.info("Adding search optimization to share_tokens table...")
+        snowflake.execute_query("""
+            ALTER TABLE share_tokens
+            ADD SEARCH OPTIMIZATION ON EQUALITY(token, entity_id)
+        """)
+
+        logger.info("✓ Migration completed successfully!")
+        return True
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}", exc_info=True)
+        return False
+
+if __name__ == "__main__":
+    success = run_migration()
+    if success:
+        print("Migration completed successfully")
+    else:
+        print("Migration failed")
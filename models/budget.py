@@ -18,13 +18,13 @@ class BudgetItem:
     updated_at: Optional[datetime] = None
 
     # Standard budget categories
-    CATEGORIES = [
+    CATEGORIES = (
         'Revenue',
         'Operating Expenses',
         'Debt Service',
         'Capital Expenses',
         'Net Operating Income'
-    ]
+    )
 
     @classmethod
     def from_dict(cls, data: dict) -> 'BudgetItem':
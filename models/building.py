@@ -4,7 +4,7 @@ from typing import Optional
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Building:
     """Building data model representing a physical property"""
     building_id: str
@@ -26,6 +26,19 @@ class Building:
             updated_at=data.get('UPDATED_AT') or data.get('updated_at')
         )
 
+    @classmethod
+    def from_records(cls, records: list) -> list:
+        """Create Building instances from query records in one pass (uppercase Snowflake keys only)"""
+        return [
+            cls(record.get('BUILDING_ID'),
+                record.get('ENTITY_ID'),
+                record.get('NAME'),
+                record.get('ADDRESS'),
+                record.get('CREATED_AT'),
+                record.get('UPDATED_AT'))
+            for record in records
+        ]
+
     def to_dict(self) -> dict:
         """Convert Building instance to dictionary"""
         return {
@@ -4,7 +4,7 @@ from typing import Optional
 from datetime import datetime, date
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Document:
     """Document data model representing an uploaded file"""
     document_id: str
@@ -19,7 +19,7 @@ class Document:
     end_date: Optional[date] = None
 
     # Standard document categories
-    CATEGORIES = [
+    CATEGORIES = (
         'Insurance Policy',
         'Settlement Statement',
         'Fuel Contract',
@@ -31,16 +31,16 @@ class Document:
         'Water/Sewer Bills',
         'Electric Bills',
         'Other'
-    ]
+    )
 
     # Required documents that should always show (even if not uploaded)
-    REQUIRED_DOCUMENTS = [
+    REQUIRED_DOCUMENTS = (
         'Insurance Policy',
         'Settlement Statement',
         'Fuel Contract',
         'Property Management Agreement',
         'Loan Agreement'
-    ]
+    )
 
     @classmethod
     def from_dict(cls, data: dict) -> 'Document':
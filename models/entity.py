@@ -4,7 +4,7 @@ from typing import Optional
 from datetime import datetime
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Entity:
     """Entity data model representing a property management entity"""
     entity_id: str
@@ -24,6 +24,18 @@ class Entity:
             updated_at=data.get('UPDATED_AT') or data.get('updated_at')
         )
 
+    @classmethod
+    def from_records(cls, records: list) -> list:
+        """Create Entity instances from query records in one pass (uppercase Snowflake keys only)"""
+        return [
+            cls(record.get('ENTITY_ID'),
+                record.get('NAME'),
+                record.get('DESCRIPTION'),
+                record.get('CREATED_AT'),
+                record.get('UPDATED_AT'))
+            for record in records
+        ]
+
     def to_dict(self) -> dict:
         """Convert Entity instance to dictionary"""
         return {
@@ -0,0 +1,49 @@
+"""Shared test setup: app environment and a recording stand-in for the Snowflake client"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# app.py refuses to start without a secret key; keep uploads out of the tree,
+# storage local and the query cache off (an empty REDIS_URL is not overridden by .env)
+os.environ.setdefault('FLASK_SECRET_KEY', 'test-secret-key')
+os.environ.setdefault('UPLOAD_FOLDER', tempfile.mkdtemp(prefix='amp-test-uploads-'))
+os.environ['USE_AZURE_STORAGE'] = 'false'
+os.environ['REDIS_URL'] = ''
+
+
+class FakeSnowflake:
+    """Stand-in for SnowflakeClient that records queries and replays queued results
+
+    Queue a result (or an exception to raise) per expected call in `results`;
+    calls beyond the queue return None, as DML does.
+    """
+
+    def __init__(self):
+        self.calls = []
+        self.results = []
+        self.closed = False
+
+    def execute_query(self, query, params=None):
+        self.calls.append((query, params))
+        result = self.results.pop(0) if self.results else None
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def snowflake(monkeypatch):
+    """Route every query function in database.queries to one FakeSnowflake"""
+    from database import queries
+
+    fake = FakeSnowflake()
+    monkeypatch.setattr(queries, '_get_client', lambda: fake)
+    return fake
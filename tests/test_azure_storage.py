@@ -0,0 +1,48 @@
+"""Tests for the upload helpers in utils.azure_storage"""
+import io
+import os
+
+from utils.azure_storage import AzureStorageHelper, CountingStream
+
+
+def test_counting_stream_counts_bytes_across_reads():
+    stream = CountingStream(io.BytesIO(b'x' * 100))
+
+    assert stream.read(30) == b'x' * 30
+    assert stream.read() == b'x' * 70
+    assert stream.read(10) == b''
+    assert stream.bytes_read == 100
+
+
+def test_counting_stream_is_not_seekable():
+    # Uploads must not rewind a wrapped stream, or the count would double
+    assert CountingStream(io.BytesIO(b'data')).seekable() is False
+
+
+def _local_storage(monkeypatch, tmp_path):
+    monkeypatch.setenv('USE_AZURE_STORAGE', 'false')
+    monkeypatch.setenv('UPLOAD_FOLDER', str(tmp_path))
+    return AzureStorageHelper()
+
+
+def test_identical_local_uploads_share_one_file(monkeypatch, tmp_path):
+    storage = _local_storage(monkeypatch, tmp_path)
+
+    first = storage.upload_building_document('b1', 'lease.pdf', io.BytesIO(b'same bytes'))
+    second = storage.upload_building_document('b2', 'copy.pdf', io.BytesIO(b'same bytes'))
+    other = storage.upload_building_document('b1', 'lease.pdf', io.BytesIO(b'other bytes'))
+
+    assert first == second
+    assert other != first
+    with open(first, 'rb') as f:
+        assert f.read() == b'same bytes'
+
+
+def test_local_upload_leaves_no_temp_files(monkeypatch, tmp_path):
+    storage = _local_storage(monkeypatch, tmp_path)
+
+    storage.upload_building_document('b1', 'lease.pdf', io.BytesIO(b'content'))
+    storage.upload_building_document('b1', 'lease.pdf', io.BytesIO(b'content'))
+
+    leftovers = [name for _, _, files in os.walk(tmp_path) for name in files if name.startswith('.upload-')]
+    assert leftovers == []
@@ -0,0 +1,102 @@
+"""Tests for the pandas budget pivots in app.py"""
+from datetime import datetime
+
+import pandas as pd
+
+import app
+from database import queries
+
+JAN = datetime(2025, 1, 1)
+FEB = datetime(2025, 2, 1)
+
+
+def _entity_frame(rows):
+    df = pd.DataFrame(rows, columns=queries.ENTITY_BUDGET_COLUMNS)
+    df['MONTH_YEAR'] = pd.to_datetime(df['MONTH_YEAR'])
+    return df
+
+
+def test_pivot_entity_budget_totals_and_drill_down():
+    df = _entity_frame([
+        ('b1', 'Alpha', JAN, 'Rent', '100'),
+        ('b2', 'Beta', JAN, 'Rent', 50.5),
+        ('b1', 'Alpha', FEB, 'Taxes', 20),
+    ])
+
+    by_category, by_category_building, buildings = app.pivot_entity_budget(df)
+
+    assert by_category == {'Rent': {JAN: 150.5}, 'Taxes': {FEB: 20.0}}
+    assert by_category_building == {
+        'Rent': {'2025-01-01': {'b1': 100.0, 'b2': 50.5}},
+        'Taxes': {'2025-02-01': {'b1': 20.0}},
+    }
+    assert buildings == {'b1': 'Alpha', 'b2': 'Beta'}
+
+
+def test_pivot_entity_budget_skips_invalid_rows():
+    df = _entity_frame([
+        ('b1', 'Alpha', JAN, 'Rent', 100),
+        ('b3', 'Gamma', JAN, 'Rent', 'n/a'),
+    ])
+
+    by_category, _, buildings = app.pivot_entity_budget(df)
+
+    assert by_category == {'Rent': {JAN: 100.0}}
+    assert buildings == {'b1': 'Alpha'}
+
+
+def test_pivot_entity_budget_empty_frame():
+    assert app.pivot_entity_budget(_entity_frame([])) == ({}, {}, {})
+
+
+def test_pivot_building_budget_by_category_and_month():
+    rows = [
+        {'CATEGORY': 'Rent', 'MONTH_YEAR': JAN, 'AMOUNT': 100, 'NOTES': ''},
+        {'CATEGORY': 'Rent', 'MONTH_YEAR': FEB, 'AMOUNT': '110.5', 'NOTES': ''},
+        {'CATEGORY': 'Taxes', 'MONTH_YEAR': JAN, 'AMOUNT': 20, 'NOTES': ''},
+    ]
+
+    assert app.pivot_building_budget(rows) == {
+        'Rent': {JAN: 100.0, FEB: 110.5},
+        'Taxes': {JAN: 20.0},
+    }
+
+
+def test_pivot_building_budget_skips_invalid_rows():
+    rows = [
+        {'CATEGORY': 'Rent', 'MONTH_YEAR': JAN, 'AMOUNT': 100},
+        {'CATEGORY': 'Rent', 'MONTH_YEAR': None, 'AMOUNT': 100},
+        {'CATEGORY': 'Taxes', 'MONTH_YEAR': FEB, 'AMOUNT': 'n/a'},
+    ]
+
+    assert app.pivot_building_budget(rows) == {'Rent': {JAN: 100.0}}
+
+
+def test_pivot_shared_budget_formats_grid_and_totals():
+    rows = [
+        {'MONTH_YEAR': JAN, 'CATEGORY': 'Rent', 'TOTAL_AMOUNT': 1000},
+        {'MONTH_YEAR': JAN, 'CATEGORY': 'Taxes', 'TOTAL_AMOUNT': '250.5'},
+        {'MONTH_YEAR': FEB, 'CATEGORY': 'Rent', 'TOTAL_AMOUNT': 1000},
+    ]
+
+    payload = app.pivot_shared_budget(rows)
+
+    assert payload['months'] == [JAN, FEB]
+    assert payload['categories'] == ['Rent', 'Taxes']
+    assert payload['budget_by_month'] == {
+        JAN: {'Rent': 1000.0, 'Taxes': 250.5},
+        FEB: {'Rent': 1000.0, 'Taxes': 0.0},
+    }
+    assert payload['rows'] == [
+        ('Rent', ['$1,000.00', '$1,000.00'], '$2,000.00'),
+        ('Taxes', ['$250.50', '$0.00'], '$250.50'),
+    ]
+    assert payload['month_totals'] == ['$1,250.50', '$1,000.00']
+    assert payload['grand_total'] == '$2,250.50'
+
+
+def test_pivot_shared_budget_empty():
+    payload = app.pivot_shared_budget([])
+
+    assert payload['rows'] == [] and payload['months'] == []
+    assert payload['grand_total'] == '$0.00'
@@ -0,0 +1,71 @@
+"""Tests for queries.bulk_upsert_budget_items batching and de-duplication"""
+import pandas as pd
+
+from database import queries
+
+
+def _item(month, category='Rent', amount=100, building_id='b1', notes=''):
+    return {'building_id': building_id, 'month_year': month, 'category': category,
+            'amount': amount, 'notes': notes}
+
+
+def test_empty_input_runs_no_query(snowflake):
+    assert queries.bulk_upsert_budget_items([]) == {'success': 0, 'failed': 0}
+    assert snowflake.calls == []
+
+
+def test_rows_are_split_into_batches(snowflake, monkeypatch):
+    monkeypatch.setattr(queries, 'BULK_UPSERT_BATCH_SIZE', 2)
+    items = [_item(f'2025-{month:02d}-01') for month in range(1, 6)]
+
+    results = queries.bulk_upsert_budget_items(items)
+
+    assert results == {'success': 5, 'failed': 0}
+    assert len(snowflake.calls) == 3
+    # Six bind values per source row
+    assert [len(params) for _, params in snowflake.calls] == [12, 12, 6]
+    assert all(query.count('(%s, %s, %s, %s, %s, %s)') == len(params) // 6
+               for query, params in snowflake.calls)
+
+
+def test_duplicate_keys_keep_the_last_value(snowflake):
+    items = [
+        _item('2025-01-01', amount=100),
+        _item('2025-01-01', amount=250, notes='revised'),
+        _item('2025-01-01', category='Taxes', amount=40),
+    ]
+
+    results = queries.bulk_upsert_budget_items(items)
+
+    assert results == {'success': 2, 'failed': 0}
+    (_, params), = snowflake.calls
+    rows = [params[i:i + 6] for i in range(0, len(params), 6)]
+    assert [row[1:] for row in rows] == [
+        ('b1', '2025-01-01', 'Rent', 250.0, 'revised'),
+        ('b1', '2025-01-01', 'Taxes', 40.0, None),
+    ]
+
+
+def test_failed_batch_is_counted_and_later_batches_still_run(snowflake, monkeypatch):
+    monkeypatch.setattr(queries, 'BULK_UPSERT_BATCH_SIZE', 2)
+    snowflake.results = [None, RuntimeError('warehouse suspended'), None]
+    items = [_item(f'2025-{month:02d}-01') for month in range(1, 6)]
+
+    results = queries.bulk_upsert_budget_items(items)
+
+    assert results == {'success': 3, 'failed': 2}
+    assert len(snowflake.calls) == 3
+
+
+def test_success_uses_rows_reported_by_merge(snowflake):
+    snowflake.results = [pd.DataFrame([{'number of rows inserted': 1, 'number of rows updated': 2}])]
+    items = [_item(f'2025-{month:02d}-01') for month in range(1, 4)]
+
+    assert queries.bulk_upsert_budget_items(items) == {'success': 3, 'failed': 0}
+
+
+def test_bad_amount_fails_every_item_without_querying(snowflake):
+    items = [_item('2025-01-01'), _item('2025-02-01', amount='not a number')]
+
+    assert queries.bulk_upsert_budget_items(items) == {'success': 0, 'failed': 2}
+    assert snowflake.calls == []
@@ -0,0 +1,96 @@
+"""Tests for the pooled Snowflake client in database.queries"""
+import queue
+
+import pytest
+
+from database import queries
+from tests.conftest import FakeSnowflake
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Fresh, empty pool whose new clients are FakeSnowflakes; yields the list of clients opened"""
+    clients = []
+
+    def open_client():
+        client = FakeSnowflake()
+        clients.append(client)
+        return client
+
+    monkeypatch.setattr(queries, 'SnowflakeClient', open_client)
+    monkeypatch.setattr(queries, '_pool', queue.LifoQueue())
+    monkeypatch.setattr(queries, '_pool_clients', [])
+    return clients
+
+
+def test_clients_are_reused_between_queries(opened):
+    pooled = queries._PooledClient()
+
+    pooled.execute_query("SELECT 1")
+    pooled.execute_query("SELECT 2", ('x',))
+
+    assert len(opened) == 1
+    assert opened[0].calls == [("SELECT 1", None), ("SELECT 2", ('x',))]
+    assert queries._pool.qsize() == 1
+
+
+def test_client_whose_query_raised_is_replaced(opened):
+    pooled = queries._PooledClient()
+    pooled.execute_query("SELECT 1")
+    opened[0].results = [ConnectionError('session expired')]
+
+    with pytest.raises(ConnectionError):
+        pooled.execute_query("SELECT 2")
+
+    assert opened[0].closed
+    assert opened[0] not in queries._pool_clients
+    assert queries._pool.qsize() == 0
+
+    pooled.execute_query("SELECT 3")
+    assert len(opened) == 2
+    assert opened[1].calls == [("SELECT 3", None)]
+
+
+def test_checkout_waits_for_a_free_client_at_pool_size(opened, monkeypatch):
+    monkeypatch.setattr(queries, 'SNOWFLAKE_POOL_SIZE', 1)
+    monkeypatch.setattr(queries, 'SNOWFLAKE_POOL_TIMEOUT', 0)
+
+    held = queries._checkout()
+    with pytest.raises(TimeoutError):
+        queries._checkout()
+
+    queries._pool.put(held)
+    assert queries._checkout() is held
+    assert len(opened) == 1
+
+
+def test_close_pool_closes_every_client(opened):
+    pooled = queries._PooledClient()
+    pooled.execute_query("SELECT 1")
+
+    queries.close_pool()
+
+    assert opened[0].closed
+    assert queries._pool_clients == []
+    assert queries._pool.qsize() == 0
+
+
+def test_entity_delete_runs_in_one_transaction(opened):
+    assert queries.delete_entity('e1') is True
+
+    client, = opened
+    statements = [query.split()[0] for query, _ in client.calls]
+    assert statements == ['BEGIN', 'DELETE', 'DELETE', 'DELETE', 'DELETE', 'COMMIT']
+    assert queries._pool.qsize() == 1
+
+
+def test_failed_transaction_rolls_back_and_drops_the_session(opened):
+    queries._PooledClient().execute_query("SELECT 1")
+    opened[0].results = [None, None, RuntimeError('statement failed')]
+
+    assert queries.delete_entity('e1') is False
+
+    client, = opened
+    assert [query.split()[0] for query, _ in client.calls][-2:] == ['DELETE', 'ROLLBACK']
+    assert client.closed
+    assert queries._pool.qsize() == 0
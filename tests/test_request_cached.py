@@ -0,0 +1,70 @@
+"""Tests for the per-request memoization of by-ID lookups"""
+from flask import Flask
+
+from database import queries
+
+
+def _counting_lookup(values):
+    calls = []
+
+    @queries.request_cached
+    def lookup(key):
+        calls.append(key)
+        return values.get(key)
+
+    return lookup, calls
+
+
+def test_repeat_lookups_in_one_request_hit_the_database_once():
+    lookup, calls = _counting_lookup({'a': {'ID': 'a'}})
+
+    with Flask(__name__).test_request_context():
+        assert lookup('a') == {'ID': 'a'}
+        assert lookup('a') == {'ID': 'a'}
+
+    assert calls == ['a']
+
+
+def test_cache_does_not_outlive_the_request():
+    lookup, calls = _counting_lookup({'a': {'ID': 'a'}})
+    app = Flask(__name__)
+
+    with app.test_request_context():
+        lookup('a')
+    with app.test_request_context():
+        lookup('a')
+
+    assert calls == ['a', 'a']
+
+
+def test_misses_are_not_cached():
+    lookup, calls = _counting_lookup({})
+
+    with Flask(__name__).test_request_context():
+        assert lookup('missing') is None
+        assert lookup('missing') is None
+
+    assert calls == ['missing', 'missing']
+
+
+def test_forget_drops_one_key():
+    lookup, calls = _counting_lookup({'a': {'ID': 'a'}, 'b': {'ID': 'b'}})
+
+    with Flask(__name__).test_request_context():
+        lookup('a')
+        lookup('b')
+        lookup.forget('a')
+        lookup('a')
+        lookup('b')
+
+    assert calls == ['a', 'b', 'a']
+
+
+def test_calls_outside_an_app_context_are_not_cached():
+    lookup, calls = _counting_lookup({'a': {'ID': 'a'}})
+
+    lookup('a')
+    lookup('a')
+    lookup.forget('a')
+
+    assert calls == ['a', 'a']
@@ -0,0 +1,91 @@
+"""Tests for the public shared view's ETag revalidation"""
+from datetime import datetime
+
+import pytest
+
+import app as app_module
+from database import queries
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    """Stub the shared view's queries; returns the mutable version record and a load counter"""
+    version = {'LAST_MODIFIED': datetime(2025, 1, 1, 12, 0), 'ROW_COUNT': 3}
+    loads = []
+
+    def get_entity_budget(entity_id):
+        loads.append(entity_id)
+        return [{'MONTH_YEAR': datetime(2025, 1, 1), 'CATEGORY': 'Rent', 'TOTAL_AMOUNT': 1000}]
+
+    monkeypatch.setattr(queries, 'get_entity_by_share_token',
+                        lambda token: {'ENTITY_ID': 'e1', 'NAME': 'Acme Holdings'} if token == 'tok' else None)
+    monkeypatch.setattr(queries, 'get_entity_last_modified', lambda entity_id: dict(version))
+    monkeypatch.setattr(queries, 'get_entity_budget', get_entity_budget)
+    monkeypatch.setattr(queries, 'get_buildings_by_entity',
+                        lambda entity_id: [{'BUILDING_ID': 'b1', 'ENTITY_ID': 'e1', 'NAME': 'Main St'}])
+    return version, loads
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def test_first_view_renders_with_etag(shared, client):
+    response = client.get('/shared/tok')
+
+    assert response.status_code == 200
+    assert response.headers['ETag']
+    assert response.headers['Cache-Control'] == 'public, max-age=60'
+    body = response.get_data(as_text=True)
+    assert 'Acme Holdings' in body and 'Main St' in body and '$1,000.00' in body
+
+
+def test_matching_etag_returns_304_without_loading_the_page(shared, client):
+    _, loads = shared
+    etag = client.get('/shared/tok').headers['ETag']
+    loads.clear()
+
+    response = client.get('/shared/tok', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert loads == []
+
+
+def test_etag_changes_with_the_data_version(shared, client):
+    version, _ = shared
+    etag = client.get('/shared/tok').headers['ETag']
+
+    version['ROW_COUNT'] = 2
+    response = client.get('/shared/tok', headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_page_is_served_without_etag_when_version_is_unknown(shared, client, monkeypatch):
+    monkeypatch.setattr(queries, 'get_entity_last_modified', lambda entity_id: None)
+
+    response = client.get('/shared/tok')
+
+    assert response.status_code == 200
+    assert 'ETag' not in response.headers
+
+
+def test_unknown_token_is_404(shared, client):
+    assert client.get('/shared/nope').status_code == 404
+
+
+def test_body_is_loaded_under_the_etag_version(shared, client, monkeypatch):
+    versions = []
+
+    def get_shared_view_cached(entity_id, version):
+        versions.append(version)
+        return app_module.load_shared_view(entity_id)
+
+    monkeypatch.setattr(app_module, 'get_shared_view_cached', get_shared_view_cached)
+
+    client.get('/shared/tok')
+
+    assert versions == ['e1:2025-01-01 12:00:00:3']
@@ -0,0 +1,31 @@
+"""Tests for queries.update_building's BUILDING_COLUMNS-driven field handling"""
+from database import queries
+
+
+def test_writes_only_given_columns_with_coerced_values(snowflake):
+    assert queries.update_building('b1', name='Main St', purchase_price='1250000.50', lender='') is True
+
+    (query, params), = snowflake.calls
+    assert 'SET name = %s, purchase_price = %s, lender = %s, updated_at' in query
+    assert params == ('Main St', 1250000.5, None, 'b1')
+
+
+def test_no_fields_is_a_no_op(snowflake):
+    assert queries.update_building('b1') is True
+    assert snowflake.calls == []
+
+
+def test_unknown_column_is_rejected(snowflake):
+    assert queries.update_building('b1', name='Main St', owner='someone') is False
+    assert snowflake.calls == []
+
+
+def test_bad_number_fails_without_writing(snowflake):
+    assert queries.update_building('b1', name='Main St', interest_rate='5.5%') is False
+    assert snowflake.calls == []
+
+
+def test_database_error_returns_false(snowflake):
+    snowflake.results = [RuntimeError('statement failed')]
+
+    assert queries.update_building('b1', name='Main St') is False
@@ -2,13 +2,92 @@
 Azure Blob Storage helper for document management
 """
 import os
+import shutil
+import hashlib
 import logging
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, BinaryIO
+from typing import Optional, BinaryIO, Iterator, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+from azure.core.pipeline.transport import RequestsTransport
 from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient, generate_blob_sas, BlobSasPermissions
 
 logger = logging.getLogger(__name__)
 
+# Chunk size used when copying upload streams to local storage
+COPY_CHUNK_SIZE = 64 * 1024
+
+# Blobs larger than the threshold are staged as fixed-size blocks uploaded in parallel
+UPLOAD_PARALLEL_THRESHOLD = int(os.getenv('STORAGE_BLOB_PARALLEL_THRESHOLD', 75_000_000))
+UPLOAD_BLOCK_SIZE = int(os.getenv('STORAGE_BLOB_BLOCK_SIZE', 8 * 1024 * 1024))
+UPLOAD_MAX_CONCURRENCY = int(os.getenv('STORAGE_BLOB_PARALLEL_THREADS', 4))
+
+# Blobs larger than one range are downloaded as ranged GETs in parallel
+DOWNLOAD_RANGE_SIZE = int(os.getenv('STORAGE_BLOB_RANGE_SIZE', 8 * 1024 * 1024))
+DOWNLOAD_MAX_CONCURRENCY = int(os.getenv('STORAGE_BLOB_DOWNLOAD_THREADS', 4))
+
+# Keep-alive connections held open to the storage account; must cover the
+# parallel block/range workers of every concurrent request, or urllib3 opens
+# (and TLS-handshakes) throwaway connections past the pool limit
+HTTP_POOL_SIZE = int(os.getenv('STORAGE_HTTP_POOL_SIZE', 20))
+
+
+def _pooled_transport() -> RequestsTransport:
+    """HTTP transport over one keep-alive session shared by every blob client"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return RequestsTransport(session=session, session_owner=False)
+
+
+def _download_ranges(blob_client: BlobClient, size: int) -> Iterator[bytes]:
+    """Yield a blob's content in order while fetching the next few ranges concurrently"""
+    def fetch(offset):
+        length = min(DOWNLOAD_RANGE_SIZE, size - offset)
+        return blob_client.download_blob(offset=offset, length=length).readall()
+
+    # At most DOWNLOAD_MAX_CONCURRENCY ranges are held in memory at once
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_MAX_CONCURRENCY, thread_name_prefix='blob-range') as executor:
+        pending = deque()
+        try:
+            for offset in range(0, size, DOWNLOAD_RANGE_SIZE):
+                pending.append(executor.submit(fetch, offset))
+                if len(pending) >= DOWNLOAD_MAX_CONCURRENCY:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            # Client went away mid-download; don't fetch ranges nobody will read
+            for future in pending:
+                future.cancel()
+
+
+def _rewind(file_stream: BinaryIO):
+    """Reset stream position to beginning when the stream supports it"""
+    seekable = getattr(file_stream, 'seekable', None)
+    if seekable is not None and seekable():
+        file_stream.seek(0)
+
+
+class CountingStream:
+    """Read-only wrapper that counts the bytes consumed from a stream, so uploads learn their size without seeking"""
+
+    def __init__(self, stream: BinaryIO):
+        self._stream = stream
+        self.bytes_read = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seekable(self) -> bool:
+        return False
+
 
 class AzureStorageHelper:
     """Helper class for Azure Blob Storage operations"""
@@ -24,7 +103,12 @@ class AzureStorageHelper:
                 self.use_azure = False
             else:
                 try:
-                    self.blob_service_client = BlobServiceClient.from_connection_string(connection_string)
+                    self.blob_service_client = BlobServiceClient.from_connection_string(
+                        connection_string,
+                        max_single_put_size=UPLOAD_PARALLEL_THRESHOLD,
+                        max_block_size=UPLOAD_BLOCK_SIZE,
+                        transport=_pooled_transport(),
+                    )
                     self.account_name = os.getenv('AZURE_STORAGE_ACCOUNT_NAME')
                     self.account_key = os.getenv('AZURE_STORAGE_ACCOUNT_KEY')
                     self.entity_container = os.getenv('AZURE_ENTITY_DOCUMENTS_CONTAINER', 'entity-documents')
@@ -61,14 +145,16 @@ class AzureStorageHelper:
         except Exception as e:
             logger.error(f"Error ensuring containers exist: {e}")
 
-    def upload_entity_document(self, entity_id: str, filename: str, file_stream: BinaryIO) -> str:
+    def upload_entity_document(self, entity_id: str, filename: str, file_stream: BinaryIO,
+                               length: Optional[int] = None) -> str:
         """
         Upload an entity document
 
         Args:
             entity_id: Entity ID
             filename: Original filename
-            file_stream: File-like object to upload
+            file_stream: File-like object to upload (need not be seekable)
+            length: Size in bytes, if known
 
         Returns:
             Blob path/URL for storage in database
@@ -81,9 +167,9 @@ class AzureStorageHelper:
             )
 
             try:
-                # Reset stream position to beginning
-                file_stream.seek(0)
-                blob_client.upload_blob(file_stream, overwrite=True)
+                _rewind(file_stream)
+                blob_client.upload_blob(file_stream, overwrite=True, length=length,
+                                        max_concurrency=UPLOAD_MAX_CONCURRENCY)
                 logger.info(f"Uploaded entity document to Azure: {blob_name}")
                 return blob_name
             except Exception as e:
@@ -95,21 +181,23 @@ class AzureStorageHelper:
             os.makedirs(entity_folder, exist_ok=True)
             file_path = os.path.join(entity_folder, filename)
 
-            file_stream.seek(0)
+            _rewind(file_stream)
             with open(file_path, 'wb') as f:
-                f.write(file_stream.read())
+                shutil.copyfileobj(file_stream, f, COPY_CHUNK_SIZE)
 
             logger.info(f"Uploaded entity document locally: {file_path}")
             return file_path
 
-    def upload_building_document(self, building_id: str, filename: str, file_stream: BinaryIO) -> str:
+    def upload_building_document(self, building_id: str, filename: str, file_stream: BinaryIO,
+                                 length: Optional[int] = None) -> str:
         """
         Upload a building document
 
         Args:
             building_id: Building ID
             filename: Original filename
-            file_stream: File-like object to upload
+            file_stream: File-like object to upload (need not be seekable)
+            length: Size in bytes, if known
 
         Returns:
             Blob path/URL for storage in database
@@ -122,25 +210,42 @@ class AzureStorageHelper:
             )
 
             try:
-                file_stream.seek(0)
-                blob_client.upload_blob(file_stream, overwrite=True)
+                _rewind(file_stream)
+                blob_client.upload_blob(file_stream, overwrite=True, length=length,
+                                        max_concurrency=UPLOAD_MAX_CONCURRENCY)
                 logger.info(f"Uploaded building document to Azure: {blob_name}")
                 return blob_name
             except Exception as e:
                 logger.error(f"Failed to upload to Azure Blob Storage: {e}")
                 raise
         else:
-            # Local storage fallback
-            building_folder = os.path.join(self.upload_folder, building_id)
-            os.makedirs(building_folder, exist_ok=True)
-            file_path = os.path.join(building_folder, filename)
-
-            file_stream.seek(0)
-            with open(file_path, 'wb') as f:
-                f.write(file_stream.read())
-
-            logger.info(f"Uploaded building document locally: {file_path}")
-            return file_path
+            # Local storage fallback: content-addressed, so identical uploads share one file
+            _rewind(file_stream)
+            fd, tmp_path = tempfile.mkstemp(dir=self.upload_folder, prefix='.upload-')
+            try:
+                digest = hashlib.sha256()
+                with os.fdopen(fd, 'wb') as f:
+                    while chunk := file_stream.read(COPY_CHUNK_SIZE):
+                        digest.update(chunk)
+                        f.write(chunk)
+
+                content_hash = digest.hexdigest()
+                content_folder = os.path.join(self.upload_folder, content_hash[:2])
+                os.makedirs(content_folder, exist_ok=True)
+                file_path = os.path.join(content_folder, content_hash[2:])
+
+                # Always replace: identical content by construction, and an atomic
+                # rename cannot lose the file to a concurrent upload or delete the
+                # way an exists-then-skip check could
+                os.replace(tmp_path, file_path)
+                logger.info(f"Uploaded building document locally: {file_path}")
+                return file_path
+            except Exception:
+                try:
+                    os.remove(tmp_path)
+                except FileNotFoundError:
+                    pass
+                raise
 
     def get_download_url(self, blob_path: str, container: str, expiry_hours: int = 1) -> str:
         """
@@ -201,6 +306,42 @@ class AzureStorageHelper:
             with open(blob_path, 'rb') as f:
                 return f.read()
 
+    def stream_blob(self, blob_path: str, container: str) -> Tuple[int, Iterator[bytes]]:
+        """
+        Open a blob for streaming without buffering it in memory
+
+        Args:
+            blob_path: Path to blob (or local file path)
+            container: Container name
+
+        Returns:
+            Tuple of (size in bytes, iterator over content chunks)
+        """
+        if self.use_azure:
+            blob_client = self.blob_service_client.get_blob_client(
+                container=container,
+                blob=blob_path
+            )
+
+            try:
+                size = blob_client.get_blob_properties().size
+                if size <= DOWNLOAD_RANGE_SIZE:
+                    return size, blob_client.download_blob().chunks()
+            except Exception as e:
+                logger.error(f"Failed to download from Azure: {e}")
+                raise
+            return size, _download_ranges(blob_client, size)
+        else:
+            # Local storage
+            size = os.path.getsize(blob_path)
+
+            def read_chunks():
+                with open(blob_path, 'rb') as f:
+                    while chunk := f.read(COPY_CHUNK_SIZE):
+                        yield chunk
+
+            return size, read_chunks()
+
     def delete_entity_document(self, blob_path: str) -> bool:
         """
         Delete an entity document
@@ -227,10 +368,10 @@ class AzureStorageHelper:
         else:
             # Local storage
             try:
-                if os.path.exists(blob_path):
-                    os.remove(blob_path)
-                    logger.info(f"Deleted entity document locally: {blob_path}")
-                    return True
+                os.remove(blob_path)
+                logger.info(f"Deleted entity document locally: {blob_path}")
+                return True
+            except FileNotFoundError:
                 return False
             except Exception as e:
                 logger.error(f"Failed to delete local file: {e}")
@@ -262,10 +403,10 @@ class AzureStorageHelper:
         else:
             # Local storage
             try:
-                if os.path.exists(blob_path):
-                    os.remove(blob_path)
-                    logger.info(f"Deleted building document locally: {blob_path}")
-                    return True
+                os.remove(blob_path)
+                logger.info(f"Deleted building document locally: {blob_path}")
+                return True
+            except FileNotFoundError:
                 return False
             except Exception as e:
                 logger.error(f"Failed to delete local file: {e}")
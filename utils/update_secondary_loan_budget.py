@@ -4,7 +4,8 @@ This script adds secondary loan budget items to an existing budget
 """
 import sys
 import uuid
-from datetime import datetime, date
+import logging
+from datetime import datetime
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,6 +13,8 @@ load_dotenv()
 
 from foundation.clients import SnowflakeClient
 
+logger = logging.getLogger(__name__)
+
 
 def calculate_amortization(remaining_balance, monthly_rate, monthly_payment):
     """Calculate interest and principal for a specific month"""
@@ -26,17 +29,18 @@ def calculate_amortization(remaining_balance, monthly_rate, monthly_payment):
     }
 
 
-def update_secondary_loan_budget(building_id, auto_confirm=False):
+def update_secondary_loan_budget(building_id, auto_confirm=False, logger=logger):
     """Add secondary loan budget items to existing budget
 
     Args:
         building_id: The building to update
         auto_confirm: If True, automatically confirm deletion of existing items
+        logger: Logger that receives progress messages (defaults to this module's)
     """
     snowflake = SnowflakeClient()
 
     # Get building details
-    query = f"""
+    query = """
     SELECT
         building_id,
         name,
@@ -45,12 +49,12 @@ def update_secondary_loan_budget(building_id, auto_confirm=False):
         secondary_loan_duration_years,
         secondary_interest_rate
     FROM buildings
-    WHERE building_id = '{building_id}'
+    WHERE building_id = %s
     """
-    building_result = snowflake.execute_query(query)
+    building_result = snowflake.execute_query(query, (building_id,))
 
     if building_result is None or building_result.empty:
-        print(f"Building {building_id} not found")
+        logger.warning("Building %s not found", building_id)
         return False
 
     building = building_result.iloc[0]
@@ -59,7 +63,7 @@ def update_secondary_loan_budget(building_id, auto_confirm=False):
     # Check if building has a secondary loan
     secondary_amount = float(building['SECONDARY_LOAN_AMOUNT'] or 0)
     if secondary_amount <= 0:
-        print(f"Building '{building_name}' has no secondary loan")
+        logger.warning("Building '%s' has no secondary loan", building_name)
         return False
 
     secondary_rate = float(building['SECONDARY_INTEREST_RATE'] or 0)
@@ -67,63 +71,63 @@ def update_secondary_loan_budget(building_id, auto_confirm=False):
     secondary_orig_date = building['SECONDARY_LOAN_ORIGINATION_DATE']
 
     if secondary_rate <= 0 or secondary_years <= 0:
-        print(f"Building '{building_name}' has incomplete secondary loan information")
+        logger.warning("Building '%s' has incomplete secondary loan information", building_name)
         return False
 
-    print(f"Processing building: {building_name}")
-    print(f"Secondary Loan: ${secondary_amount:,.2f} at {secondary_rate}% for {secondary_years} years")
+    logger.info("Processing building: %s", building_name)
+    logger.info("Secondary Loan: $%s at %s%% for %s years", f"{secondary_amount:,.2f}", secondary_rate, secondary_years)
 
     # Calculate monthly payment
     monthly_rate = (secondary_rate / 100) / 12
     num_payments = secondary_years * 12
     monthly_payment = secondary_amount * (monthly_rate * (1 + monthly_rate)**num_payments) / ((1 + monthly_rate)**num_payments - 1)
 
-    print(f"Monthly Payment: ${monthly_payment:.2f}")
+    logger.info("Monthly Payment: $%.2f", monthly_payment)
 
     # Get existing budget months
-    query = f"""
+    query = """
     SELECT DISTINCT month_year
     FROM budget_items
-    WHERE building_id = '{building_id}'
+    WHERE building_id = %s
     ORDER BY month_year
     """
-    months_result = snowflake.execute_query(query)
+    months_result = snowflake.execute_query(query, (building_id,))
 
     if months_result is None or months_result.empty:
-        print(f"No existing budget found for building '{building_name}'")
+        logger.warning("No existing budget found for building '%s'", building_name)
         return False
 
     months = months_result['MONTH_YEAR'].tolist()
-    print(f"Found {len(months)} months in existing budget")
+    logger.info("Found %s months in existing budget", len(months))
 
     # Check if secondary loan items already exist
-    query = f"""
+    query = """
     SELECT COUNT(*) as count
     FROM budget_items
-    WHERE building_id = '{building_id}'
+    WHERE building_id = %s
     AND category IN ('Secondary Interest Payment', 'Secondary Principal Payment')
     """
-    existing_result = snowflake.execute_query(query)
+    existing_result = snowflake.execute_query(query, (building_id,))
     existing_count = int(existing_result.iloc[0]['COUNT'])
 
     if existing_count > 0:
-        print(f"Secondary loan budget items already exist ({existing_count} items)")
+        logger.info("Secondary loan budget items already exist (%s items)", existing_count)
         if not auto_confirm:
             response = input("Do you want to delete and recreate them? (yes/no): ")
             if response.lower() != 'yes':
-                print("Cancelled")
+                logger.info("Cancelled")
                 return False
         else:
-            print("Auto-confirming deletion (called from web UI)")
+            logger.info("Auto-confirming deletion (called from web UI)")
 
         # Delete existing secondary loan items
-        delete_query = f"""
+        delete_query = """
         DELETE FROM budget_items
-        WHERE building_id = '{building_id}'
+        WHERE building_id = %s
         AND category IN ('Secondary Interest Payment', 'Secondary Principal Payment')
         """
-        snowflake.execute_query(delete_query)
-        print("Deleted existing secondary loan items")
+        snowflake.execute_query(delete_query, (building_id,))
+        logger.info("Deleted existing secondary loan items")
 
     # Calculate loan start position
     if secondary_orig_date:
@@ -134,9 +138,9 @@ def update_secondary_loan_budget(building_id, auto_confirm=False):
 
     # Track remaining balance
     remaining_balance = secondary_amount
-    items_created = 0
+    rows = []
 
-    # Create budget items for each month
+    # Build the interest and principal budget items for each month
     for i, month in enumerate(months):
         if isinstance(month, str):
             month_date = datetime.strptime(month, '%Y-%m-%d').date()
@@ -161,51 +165,29 @@ def update_secondary_loan_budget(building_id, auto_confirm=False):
             remaining_balance = amortization['remaining_balance']
             note_suffix = f"balance: ${remaining_balance:,.2f}"
 
-        # Insert Secondary Interest Payment
-        interest_id = str(uuid.uuid4())
-        interest_note = f'Secondary loan: {secondary_rate}% interest - {note_suffix}'
-        insert_query = f"""
-        INSERT INTO budget_items (
-            budget_item_id, building_id, month_year, category, amount, notes, created_at, updated_at
-        ) VALUES (
-            '{interest_id}',
-            '{building_id}',
-            '{month_str}',
-            'Secondary Interest Payment',
-            {interest_amount},
-            '{interest_note}',
-            CURRENT_TIMESTAMP(),
-            CURRENT_TIMESTAMP()
-        )
-        """
-        snowflake.execute_query(insert_query)
-        items_created += 1
-
-        # Insert Secondary Principal Payment
-        principal_id = str(uuid.uuid4())
-        principal_note = f'Secondary loan principal - {note_suffix}'
-        insert_query = f"""
-        INSERT INTO budget_items (
-            budget_item_id, building_id, month_year, category, amount, notes, created_at, updated_at
-        ) VALUES (
-            '{principal_id}',
-            '{building_id}',
-            '{month_str}',
-            'Secondary Principal Payment',
-            {principal_amount},
-            '{principal_note}',
-            CURRENT_TIMESTAMP(),
-            CURRENT_TIMESTAMP()
-        )
-        """
-        snowflake.execute_query(insert_query)
-        items_created += 1
+        rows.append((str(uuid.uuid4()), building_id, month_str, 'Secondary Interest Payment',
+                     interest_amount, f'Secondary loan: {secondary_rate}% interest - {note_suffix}'))
+        rows.append((str(uuid.uuid4()), building_id, month_str, 'Secondary Principal Payment',
+                     principal_amount, f'Secondary loan principal - {note_suffix}'))
+
+    # One multi-row INSERT instead of a round trip per budget item
+    values_clause = ',\n        '.join(['(%s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP(), CURRENT_TIMESTAMP())'] * len(rows))
+    insert_query = f"""
+    INSERT INTO budget_items (
+        budget_item_id, building_id, month_year, category, amount, notes, created_at, updated_at
+    ) VALUES
+        {values_clause}
+    """
+    snowflake.execute_query(insert_query, tuple(value for row in rows for value in row))
+    items_created = len(rows)
 
-    print(f"Successfully created {items_created} secondary loan budget items")
+    logger.info("Successfully created %s secondary loan budget items", items_created)
     return True
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
     if len(sys.argv) < 2:
         print("Usage: python update_secondary_loan_budget.py <building_id>")
         print("\nOr run interactively:")